@@ -1,9 +1,23 @@
 import streamlit as st
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime
+from datetime import datetime, timedelta
+import logging
 import os
+import re
+import threading
+import uuid
+from data_store import (Dataset, build_entity_stats, date_range_rows, entity_articles, filter_articles, find_workbooks,
+                        get_store, latest_articles, merge_articles, prepare_articles, range_entity_stats)
+from exports import ARTICLE_TABLE, COMPETITOR_TABLE, EXPORT_FORMATS, export_to_file, format_display
+import instrumentation
+from instrumentation import span
+from summarizer import get_pipeline
+
+logger = logging.getLogger(__name__)
 
 # Page configuration
 st.set_page_config(
@@ -452,18 +466,45 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# A single workbook, a directory of workbooks or a glob pattern
+DATA_SOURCE = os.environ.get("KEC_DATA_SOURCE", "competitor_data.xlsx")
+
+DATE_RANGE_DAYS = {"Last 7 Days": 7, "Last 30 Days": 30, "Last 90 Days": 90}
+DATE_RANGE_OPTIONS = ["All Time"] + list(DATE_RANGE_DAYS) + ["Custom Range"]
+
+ALL_COMPETITORS = "All Competitors"
+ALL_SBUS = "All Business Units"
+
 # Initialize session state
 if 'raw_data' not in st.session_state:
     st.session_state.raw_data = None
-if 'filtered_data' not in st.session_state:
-    st.session_state.filtered_data = None
+if 'summary_stats' not in st.session_state:
+    st.session_state.summary_stats = None
+if 'entity_codes' not in st.session_state:
+    st.session_state.entity_codes = None
+if 'data_version' not in st.session_state:
+    st.session_state.data_version = None
+if 'ingest_report' not in st.session_state:
+    st.session_state.ingest_report = []
+if 'upload_id' not in st.session_state:
+    st.session_state.upload_id = None
 if 'active_tab' not in st.session_state:
     st.session_state.active_tab = "Executive Summary"
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex[:8]
+if 'profiler' not in st.session_state:
+    st.session_state.profiler = None
 
-# ═════════════════════════════════════════════════════════════════
-# HEADER WITH KEC LOGO AND BRANDING
-# ═════════════════════════════════════════════════════════════════
-st.markdown("""
+# Collect timing spans for this rerun (no-op unless instrumentation is on)
+instrumentation.begin_rerun(st.session_state.session_id)
+if st.session_state.profiler is not None:
+    st.session_state.profiler.attach(threading.get_ident())
+
+try:
+    # ═════════════════════════════════════════════════════════════════
+    # HEADER WITH KEC LOGO AND BRANDING
+    # ═════════════════════════════════════════════════════════════════
+    st.markdown("""
 <div class="kec-header">
     <div class="header-left">
         <div class="header-logo">K</div>
@@ -475,396 +516,566 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# ═════════════════════════════════════════════════════════════════
-# LOAD DEFAULT EXCEL FILE
-# ═════════════════════════════════════════════════════════════════
-def load_default_data():
-    """Load data from default Excel file stored in project"""
-    excel_file_path = "competitor_data.xlsx"
-    
-    if os.path.exists(excel_file_path):
-        try:
-            df = pd.read_excel(excel_file_path)
-            
-            # Process data
-            processed_data = []
-            for _, row in df.iterrows():
-                sbu_list = str(row.get('SBU', '')).split(',') if pd.notna(row.get('SBU')) else []
-                sbu_list = [s.strip() for s in sbu_list if s.strip()]
-                
-                comp_list = str(row.get('Competitor', '')).split(',') if pd.notna(row.get('Competitor')) else []
-                comp_list = [c.strip() for c in comp_list if c.strip()]
-                
-                processed_data.append({
-                    'keyword': str(row.get('keyword', '')).strip(),
-                    'newstitle': str(row.get('newstitle', 'No title'))[:200],
-                    'summary': str(row.get('summary', 'No summary available'))[:300],
-                    'sbu_list': sbu_list,
-                    'competitor_list': comp_list,
-                    'publishedate': pd.to_datetime(row.get('publishedate', datetime.now())),
-                    'source': str(row.get('source', 'Unknown')).strip(),
-                    'category': str(row.get('category', 'Other')).strip()
-                })
-            
-            return pd.DataFrame(processed_data)
-        except Exception as e:
-            st.warning(f"Could not load default file: {str(e)}")
-            return None
-    return None
-
-# Load default data
-if st.session_state.raw_data is None:
-    default_data = load_default_data()
-    if default_data is not None:
-        st.session_state.raw_data = default_data
-        st.session_state.filtered_data = default_data.copy()
-
-# ═════════════════════════════════════════════════════════════════
-# MAIN TABS
-# ═════════════════════════════════════════════════════════════════
-
-tab1, tab2, tab3, tab4 = st.tabs(["Executive Summary", "Competitors", "BU Specific", "Industry Updates"])
-
-# ═════════════════════════════════════════════════════════════════
-# EXECUTIVE SUMMARY TAB
-# ═════════════════════════════════════════════════════════════════
-with tab1:
-    if st.session_state.raw_data is not None:
-        df = st.session_state.raw_data
-        
-        # Major moves - top 6-7 articles
-        st.markdown("### 📊 Major Moves")
-        
-        # Get top articles sorted by date
-        top_articles = df.sort_values('publishedate', ascending=False).head(7)
-        
-        # Sub-tabs for filtering within Executive Summary
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            unique_competitors = set()
-            for comp_list in df['competitor_list']:
-                unique_competitors.update(comp_list)
-            competitor_filter = st.selectbox("Filter by Competitor", 
-                                            ["All"] + sorted(list(unique_competitors)),
-                                            key="exec_comp")
-        
-        with col2:
-            unique_categories = df['category'].unique()
-            category_filter = st.selectbox("Filter by News Type", 
-                                          ["All"] + sorted(list(unique_categories)),
-                                          key="exec_cat")
-        
-        with col3:
-            unique_sbus = set()
-            for sbu_list in df['sbu_list']:
-                unique_sbus.update(sbu_list)
-            sbu_filter = st.selectbox("Filter by BU", 
-                                     ["All"] + sorted(list(unique_sbus)),
-                                     key="exec_sbu")
-        
-        # Apply filters to top articles
-        filtered_top = top_articles.copy()
-        
-        if competitor_filter != "All":
-            filtered_top = filtered_top[filtered_top['competitor_list'].apply(lambda x: competitor_filter in x)]
+    # ═════════════════════════════════════════════════════════════════
+    # LOAD DEFAULT EXCEL FILE
+    # ═════════════════════════════════════════════════════════════════
+    def load_default_data():
+        """Return the shared dataset for the default workbook(s) stored in project.
         
-        if category_filter != "All":
-            filtered_top = filtered_top[filtered_top['category'] == category_filter]
+        KEC_DATA_SOURCE may point at a single workbook, a directory of workbooks
+        or a glob pattern; matched sheets are parsed in parallel processes. The
+        shared store only re-reads them when one of the files changes.
+        """
+        if find_workbooks(DATA_SOURCE):
+            try:
+                dataset, fresh = get_store().load(DATA_SOURCE)
+                if fresh:
+                    queue_summaries(dataset)
+                return dataset
+            except Exception as e:
+                st.warning(f"Could not load default file: {str(e)}")
+                return None
+        return None
+
+    # ═════════════════════════════════════════════════════════════════
+    # DATE RANGE FILTERING
+    # ═════════════════════════════════════════════════════════════════
+    def select_date_range(key):
+        """Render the date range picker and return the chosen (start, end) dates"""
+        choice = st.selectbox("Date Range", DATE_RANGE_OPTIONS, key=f"{key}_range")
+        today = datetime.now().date()
         
-        if sbu_filter != "All":
-            filtered_top = filtered_top[filtered_top['sbu_list'].apply(lambda x: sbu_filter in x)]
+        if choice == "All Time":
+            return None, None
         
-        # Display article cards
-        st.markdown("<br>", unsafe_allow_html=True)
+        if choice == "Custom Range":
+            picked = st.date_input("Custom Range",
+                                   value=(today - timedelta(days=30), today),
+                                   key=f"{key}_custom")
+            # The picker returns a partial tuple while the user is still choosing
+            if isinstance(picked, (tuple, list)):
+                start = picked[0] if len(picked) > 0 else None
+                end = picked[1] if len(picked) > 1 else None
+                return start, end
+            return picked, picked
         
-        for idx, (_, article) in enumerate(filtered_top.iterrows()):
-            competitor = article['competitor_list'][0] if article['competitor_list'] else "N/A"
-            category = article['category']
-            sbu = article['sbu_list'][0] if article['sbu_list'] else "N/A"
-            
-            st.markdown(f"""
-            <div class="article-summary-card">
-                <h4 class="article-title">{article['newstitle']}</h4>
-                <p class="article-summary">{article['summary']}</p>
-                <div class="article-meta">
-                    <span class="article-badge competitor">{competitor}</span>
-                    <span class="article-badge category">{category}</span>
-                    <span class="article-badge sbu">{sbu}</span>
-                </div>
-                <div class="article-source">
-                    <strong>{article['source']}</strong> • {article['publishedate'].strftime('%d %b %Y')}
-                </div>
+        return today - timedelta(days=DATE_RANGE_DAYS[choice]), today
+
+    # ═════════════════════════════════════════════════════════════════
+    # SUMMARY STATISTICS
+    # ═════════════════════════════════════════════════════════════════
+    def set_dataset(dataset):
+        """Point this session at a dataset snapshot from the shared store"""
+        st.session_state.raw_data = dataset.articles
+        st.session_state.summary_stats = dataset.stats
+        st.session_state.entity_codes = dataset.codes
+        st.session_state.data_version = dataset.version
+        st.session_state.ingest_report = dataset.ingest_report
+
+    def render_summary_cards(cards):
+        """Render (title, value, subtext) tuples as a row of summary cards"""
+        for col, (title, value, subtext) in zip(st.columns(len(cards)), cards):
+            with col:
+                subtext_html = f'<div class="subtext">{subtext}</div>' if subtext else ''
+                st.markdown(f"""
+            <div class="summary-card">
+                <h4>{title}</h4>
+                <div class="value">{value}</div>{subtext_html}
             </div>
             """, unsafe_allow_html=True)
+
+    def activity_subtext(entity_stats):
+        """Describe last-seen date and 30-day momentum for a stats table row"""
+        if pd.isna(entity_stats['last_seen']):
+            return None
+        return (f"Last seen {entity_stats['last_seen'].strftime('%d %b %Y')} • "
+                f"{entity_stats['delta_30_days']:+d} vs prior 30 days")
+
+    def render_leaderboard(stats, entity_label, key):
+        """Show the stats table for every entity, sorted on the chosen metric"""
+        labels = {
+            'articles': 'Total Articles',
+            'categories': 'News Categories',
+            'business_units': 'Business Units',
+            'competitors': 'Competitors Mentioned',
+            'sources': 'News Sources',
+            'last_seen': 'Last Seen',
+            'last_30_days': 'Last 30 Days',
+            'delta_30_days': '30-Day Change'
+        }
+        labels = {col: label for col, label in labels.items() if col in stats.columns}
         
-        if len(filtered_top) == 0:
-            st.info("No articles match your filters")
-    else:
-        st.info("Upload an Excel file to get started")
-
-# ═════════════════════════════════════════════════════════════════
-# COMPETITORS TAB
-# ═════════════════════════════════════════════════════════════════
-with tab2:
-    if st.session_state.raw_data is not None:
-        df = st.session_state.raw_data
-        
-        # Get unique competitors
-        unique_competitors = set()
-        for comp_list in df['competitor_list']:
-            unique_competitors.update(comp_list)
+        if stats.empty:
+            st.info("No articles found for this date range")
+            return
         
-        st.markdown("### 🏢 Competitors")
+        sort_label = st.selectbox("Sort by", list(labels.values()), key=f"{key}_sort")
+        sort_col = next(col for col, label in labels.items() if label == sort_label)
         
-        # Create filter
-        selected_competitor = st.selectbox("Select Competitor", 
-                                          sorted(list(unique_competitors)),
-                                          key="comp_select")
+        with span('rendering', f'{key}_leaderboard'):
+            board = stats.sort_values(sort_col, ascending=False).reset_index(names=entity_label)
+            board['last_seen'] = board['last_seen'].dt.strftime('%d %b %Y')
+            board = board.rename(columns=labels)
         
-        # Filter articles for selected competitor
-        comp_articles = df[df['competitor_list'].apply(lambda x: selected_competitor in x)]
+            st.dataframe(board, use_container_width=True, hide_index=True)
+
+    # ═════════════════════════════════════════════════════════════════
+    # ARTICLE SUMMARIES (generated in the background)
+    # ═════════════════════════════════════════════════════════════════
+    def summary_pipeline():
+        """The shared summarizer, or None if its cache cannot be opened.
+    
+        The backend is started by the pipeline's own worker thread, so a slow
+        or failing backend never holds up a rerun.
+        """
+        try:
+            return get_pipeline()
+        except Exception:
+            logger.exception("Summary pipeline unavailable")
+            return None
+
+    def queue_summaries(dataset):
+        """Hand a newly published dataset to the summarizer without waiting for it"""
+        pipeline = summary_pipeline()
+        if pipeline is not None:
+            pipeline.submit(dataset.articles)
+
+    def cached_summaries(articles):
+        """Summaries already generated for these articles; the rest fall back to ingest text"""
+        pipeline = summary_pipeline()
+        return pipeline.lookup(articles['content_hash']) if pipeline is not None else {}
+
+    # Follow the shared default data (re-read when its workbooks change) unless this session uploaded a file
+    if st.session_state.upload_id is None:
+        with span('ingest', 'default_workbooks'):
+            dataset = load_default_data()
+        if dataset is not None and dataset.version != st.session_state.data_version:
+            set_dataset(dataset)
+
+    # ═════════════════════════════════════════════════════════════════
+    # EXPORTS
+    # ═════════════════════════════════════════════════════════════════
+    def render_export(articles, rows, columns, file_stem, key):
+        """Offer a download of the rows currently shown in a table.
         
-        # Show summary cards
-        col1, col2, col3, col4 = st.columns(4)
+        The file is only built when asked for, chunk by chunk from the filtered
+        row index into a temporary file, so reruns never pay for it. The
+        download button still holds the finished file in Streamlit's in-memory
+        media store, so very large exports belong on the query API's
+        /articles/export endpoint, which streams them.
+        """
+        col1, col2, col3 = st.columns([2, 1, 3])
         
         with col1:
-            st.markdown(f"""
-            <div class="summary-card">
-                <h4>Total Articles</h4>
-                <div class="value">{len(comp_articles)}</div>
-            </div>
-            """, unsafe_allow_html=True)
+            export_format = st.selectbox("Export as", list(EXPORT_FORMATS), key=f"{key}_export_format",
+                                         label_visibility="collapsed")
         
         with col2:
-            unique_cats = comp_articles['category'].nunique()
-            st.markdown(f"""
-            <div class="summary-card">
-                <h4>News Categories</h4>
-                <div class="value">{unique_cats}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            unique_sbus = set()
-            for sbu_list in comp_articles['sbu_list']:
-                unique_sbus.update(sbu_list)
-            st.markdown(f"""
-            <div class="summary-card">
-                <h4>Business Units</h4>
-                <div class="value">{len(unique_sbus)}</div>
-            </div>
-            """, unsafe_allow_html=True)
+            prepare = st.button("Prepare Export", key=f"{key}_export",
+                                help="Large exports are held in server memory; the query API's /articles/export streams them instead")
         
-        with col4:
-            unique_sources = comp_articles['source'].nunique()
-            st.markdown(f"""
-            <div class="summary-card">
-                <h4>News Sources</h4>
-                <div class="value">{unique_sources}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        # Show articles table
-        st.markdown("<br><br>", unsafe_allow_html=True)
-        st.markdown(f"### 📰 Recent Articles - {selected_competitor}")
-        
-        if len(comp_articles) > 0:
-            display_df = comp_articles[['newstitle', 'category', 'source', 'publishedate']].copy()
-            display_df.columns = ['Title', 'Category', 'Source', 'Date']
-            display_df['Date'] = display_df['Date'].dt.strftime('%d %b %Y')
+        if prepare:
+            extension, mime = EXPORT_FORMATS[export_format]
+            file_name = f"{re.sub(r'[^A-Za-z0-9]+', '_', file_stem).strip('_').lower()}_{datetime.now():%Y%m%d}.{extension}"
+            with st.spinner(f"Exporting {len(rows)} articles..."):
+                # download_button only takes bytes, str or a file opened with open()
+                with export_to_file(export_format, articles, rows, columns) as export_file:
+                    data = export_file.read()
+            with col3:
+                st.download_button(f"⬇ Download {file_name}", data=data, file_name=file_name,
+                                   mime=mime, key=f"{key}_download")
+
+    # ═════════════════════════════════════════════════════════════════
+    # QUERY API (optional, shares this process's store)
+    # ═════════════════════════════════════════════════════════════════
+    @st.cache_resource
+    def start_query_api(port):
+        """Start the read-only query API once per Streamlit server process"""
+        import query_api
+        # The API reloads the default workbooks itself, so it stays current without dashboard reruns
+        return query_api.start_in_background(port, source=DATA_SOURCE, on_reload=queue_summaries)
+
+    if os.environ.get("KEC_API_PORT"):
+        start_query_api(int(os.environ["KEC_API_PORT"]))
+
+    # ═════════════════════════════════════════════════════════════════
+    # MAIN TABS
+    # ═════════════════════════════════════════════════════════════════
+
+    tab1, tab2, tab3, tab4 = st.tabs(["Executive Summary", "Competitors", "BU Specific", "Industry Updates"])
+
+    # ═════════════════════════════════════════════════════════════════
+    # EXECUTIVE SUMMARY TAB
+    # ═════════════════════════════════════════════════════════════════
+    with tab1:
+        if st.session_state.raw_data is not None:
+            df = st.session_state.raw_data
+            
+            # Major moves - top 6-7 articles
+            st.markdown("### 📊 Major Moves")
+            
+            # Sub-tabs for filtering within Executive Summary
+            col1, col2, col3, col4 = st.columns(4)
+
+            with col1:
+                competitor_filter = st.selectbox("Filter by Competitor", 
+                                                ["All"] + list(st.session_state.summary_stats['competitor'].index),
+                                                key="exec_comp")
+            
+            with col2:
+                unique_categories = df['category'].unique()
+                category_filter = st.selectbox("Filter by News Type", 
+                                              ["All"] + sorted(list(unique_categories)),
+                                              key="exec_cat")
+            
+            with col3:
+                sbu_filter = st.selectbox("Filter by BU", 
+                                         ["All"] + list(st.session_state.summary_stats['sbu'].index),
+                                         key="exec_sbu")
+
+            with col4:
+                start_date, end_date = select_date_range("exec")
+
+            with span('filtering', 'executive_summary'):
+                # Top 7 articles in the range by date, then narrowed by the filters
+                filtered_top = latest_articles(df, st.session_state.entity_codes,
+                                               competitor=None if competitor_filter == "All" else competitor_filter,
+                                               category=None if category_filter == "All" else category_filter,
+                                               sbu=None if sbu_filter == "All" else sbu_filter,
+                                               start=start_date, end=end_date, limit=7)
+            
+            # Display article cards
+            st.markdown("<br>", unsafe_allow_html=True)
+            
+            with span('rendering', 'executive_summary'):
+                summaries = cached_summaries(filtered_top)
+                for idx, (_, article) in enumerate(filtered_top.iterrows()):
+                    competitor = article['competitor_list'][0] if article['competitor_list'] else "N/A"
+                    category = article['category']
+                    sbu = article['sbu_list'][0] if article['sbu_list'] else "N/A"
+                
+                    st.markdown(f"""
+                <div class="article-summary-card">
+                    <h4 class="article-title">{article['newstitle']}</h4>
+                    <p class="article-summary">{summaries.get(article['content_hash'], article['summary'])}</p>
+                    <div class="article-meta">
+                        <span class="article-badge competitor">{competitor}</span>
+                        <span class="article-badge category">{category}</span>
+                        <span class="article-badge sbu">{sbu}</span>
+                    </div>
+                    <div class="article-source">
+                        <strong>{article['source']}</strong> • {article['publishedate'].strftime('%d %b %Y')}
+                    </div>
+                </div>
+                """, unsafe_allow_html=True)
             
-            st.dataframe(display_df, use_container_width=True, hide_index=True)
+            if len(filtered_top) == 0:
+                st.info("No articles match your filters")
         else:
-            st.info("No articles found for this competitor")
-    else:
-        st.info("Upload an Excel file to get started")
-
-# ═════════════════════════════════════════════════════════════════
-# BU SPECIFIC TAB
-# ═════════════════════════════════════════════════════════════════
-with tab3:
-    if st.session_state.raw_data is not None:
-        df = st.session_state.raw_data
-        
-        # Get unique SBUs
-        unique_sbus = set()
-        for sbu_list in df['sbu_list']:
-            unique_sbus.update(sbu_list)
-        
-        st.markdown("### 🏭 Business Units")
-        
-        # Create filter
-        selected_sbu = st.selectbox("Select Business Unit", 
-                                   sorted(list(unique_sbus)),
-                                   key="sbu_select")
-        
-        # Filter articles for selected SBU
-        sbu_articles = df[df['sbu_list'].apply(lambda x: selected_sbu in x)]
-        
-        # Show summary cards
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.markdown(f"""
-            <div class="summary-card">
-                <h4>Total Articles</h4>
-                <div class="value">{len(sbu_articles)}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            unique_competitors = set()
-            for comp_list in sbu_articles['competitor_list']:
-                unique_competitors.update(comp_list)
-            st.markdown(f"""
-            <div class="summary-card">
-                <h4>Competitors Mentioned</h4>
-                <div class="value">{len(unique_competitors)}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            unique_cats = sbu_articles['category'].nunique()
-            st.markdown(f"""
-            <div class="summary-card">
-                <h4>News Categories</h4>
-                <div class="value">{unique_cats}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col4:
-            unique_sources = sbu_articles['source'].nunique()
-            st.markdown(f"""
-            <div class="summary-card">
-                <h4>News Sources</h4>
-                <div class="value">{unique_sources}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        # Show articles table
-        st.markdown("<br><br>", unsafe_allow_html=True)
-        st.markdown(f"### 📰 Recent Articles - {selected_sbu}")
-        
-        if len(sbu_articles) > 0:
-            display_df = sbu_articles[['newstitle', 'category', 'competitor_list', 'source', 'publishedate']].copy()
-            display_df['Competitors'] = display_df['competitor_list'].apply(lambda x: ', '.join(x) if x else 'N/A')
-            display_df = display_df[['newstitle', 'category', 'Competitors', 'source', 'publishedate']]
-            display_df.columns = ['Title', 'Category', 'Competitors', 'Source', 'Date']
-            display_df['Date'] = display_df['Date'].dt.strftime('%d %b %Y')
-            
-            st.dataframe(display_df, use_container_width=True, hide_index=True)
+            st.info("Upload an Excel file to get started")
+
+    # ═════════════════════════════════════════════════════════════════
+    # COMPETITORS TAB
+    # ═════════════════════════════════════════════════════════════════
+    with tab2:
+        if st.session_state.raw_data is not None:
+            df = st.session_state.raw_data
+            
+            stats = st.session_state.summary_stats['competitor']
+            
+            st.markdown("### 🏢 Competitors")
+            
+            # Create filter
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                selected_competitor = st.selectbox("Select Competitor",
+                                                  [ALL_COMPETITORS] + list(stats.index),
+                                                  key="comp_select")
+            
+            with col2:
+                start_date, end_date = select_date_range("comp")
+            
+            all_time = start_date is None and end_date is None
+            
+            if selected_competitor == ALL_COMPETITORS:
+                # Leaderboard: precomputed for all time, aggregated over the range otherwise
+                with span('aggregation', 'competitor_leaderboard'):
+                    if not all_time:
+                        stats = build_entity_stats(date_range_rows(df, start_date, end_date), st.session_state.entity_codes,
+                                                   'competitor_list', 'sbu_list', 'business_units')
+                render_leaderboard(stats, 'Competitor', "comp_board")
+            else:
+                # Filter articles for selected competitor within the date range, newest first
+                with span('filtering', 'competitors'):
+                    comp_articles = entity_articles(df, st.session_state.entity_codes, 'competitor_list',
+                                                    selected_competitor, start_date, end_date)
+            
+                # Summary cards are lookups into the stats table unless a date range is active
+                with span('aggregation', 'competitor_cards'):
+                    if all_time:
+                        card_stats = stats.loc[selected_competitor]
+                        subtext = activity_subtext(card_stats)
+                    else:
+                        card_stats = range_entity_stats(comp_articles, 'sbu_list', 'business_units')
+                        subtext = None
+            
+                render_summary_cards([
+                    ("Total Articles", card_stats['articles'], subtext),
+                    ("News Categories", card_stats['categories'], None),
+                    ("Business Units", card_stats['business_units'], None),
+                    ("News Sources", card_stats['sources'], None)
+                ])
+            
+                # Show articles table
+                st.markdown("<br><br>", unsafe_allow_html=True)
+                st.markdown(f"### 📰 Recent Articles - {selected_competitor}")
+            
+                if len(comp_articles) > 0:
+                    with span('rendering', 'competitor_table'):
+                        display_df = format_display(comp_articles, COMPETITOR_TABLE)
+                    
+                        st.dataframe(display_df, use_container_width=True, hide_index=True)
+                    render_export(df, comp_articles.index, COMPETITOR_TABLE, selected_competitor, "comp")
+                else:
+                    st.info("No articles found for this competitor")
         else:
-            st.info("No articles found for this BU")
-    else:
-        st.info("Upload an Excel file to get started")
-
-# ═════════════════════════════════════════════════════════════════
-# INDUSTRY UPDATES TAB
-# ═════════════════════════════════════════════════════════════════
-with tab4:
-    if st.session_state.raw_data is not None:
-        df = st.session_state.raw_data
-        
-        st.markdown("### 📰 All Industry Updates")
-        
-        # Filters
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            unique_competitors = set()
-            for comp_list in df['competitor_list']:
-                unique_competitors.update(comp_list)
-            competitor_filter = st.selectbox("Competitor", 
-                                            ["All"] + sorted(list(unique_competitors)),
-                                            key="ind_comp")
-        
-        with col2:
-            unique_categories = df['category'].unique()
-            category_filter = st.selectbox("News Type", 
-                                          ["All"] + sorted(list(unique_categories)),
-                                          key="ind_cat")
-        
-        with col3:
-            unique_sbus = set()
-            for sbu_list in df['sbu_list']:
-                unique_sbus.update(sbu_list)
-            sbu_filter = st.selectbox("Business Unit", 
-                                     ["All"] + sorted(list(unique_sbus)),
-                                     key="ind_sbu")
-        
-        # Apply filters
-        filtered_df = df.copy()
-        
-        if competitor_filter != "All":
-            filtered_df = filtered_df[filtered_df['competitor_list'].apply(lambda x: competitor_filter in x)]
-        
-        if category_filter != "All":
-            filtered_df = filtered_df[filtered_df['category'] == category_filter]
-        
-        if sbu_filter != "All":
-            filtered_df = filtered_df[filtered_df['sbu_list'].apply(lambda x: sbu_filter in x)]
-        
-        # Sort by date
-        filtered_df = filtered_df.sort_values('publishedate', ascending=False)
-        
-        # Show articles
-        st.markdown("<br>", unsafe_allow_html=True)
-        
-        if len(filtered_df) > 0:
-            display_df = filtered_df[['newstitle', 'category', 'competitor_list', 'source', 'publishedate']].copy()
-            display_df['Competitors'] = display_df['competitor_list'].apply(lambda x: ', '.join(x) if x else 'N/A')
-            display_df = display_df[['newstitle', 'category', 'Competitors', 'source', 'publishedate']]
-            display_df.columns = ['Title', 'Category', 'Competitors', 'Source', 'Date']
-            display_df['Date'] = display_df['Date'].dt.strftime('%d %b %Y')
-            
-            st.dataframe(display_df, use_container_width=True, hide_index=True)
+            st.info("Upload an Excel file to get started")
+
+    # ═════════════════════════════════════════════════════════════════
+    # BU SPECIFIC TAB
+    # ═════════════════════════════════════════════════════════════════
+    with tab3:
+        if st.session_state.raw_data is not None:
+            df = st.session_state.raw_data
+            
+            stats = st.session_state.summary_stats['sbu']
+            
+            st.markdown("### 🏭 Business Units")
+            
+            # Create filter
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                selected_sbu = st.selectbox("Select Business Unit",
+                                           [ALL_SBUS] + list(stats.index),
+                                           key="sbu_select")
+            
+            with col2:
+                start_date, end_date = select_date_range("sbu")
+            
+            all_time = start_date is None and end_date is None
+            
+            if selected_sbu == ALL_SBUS:
+                # Leaderboard: precomputed for all time, aggregated over the range otherwise
+                with span('aggregation', 'sbu_leaderboard'):
+                    if not all_time:
+                        stats = build_entity_stats(date_range_rows(df, start_date, end_date), st.session_state.entity_codes,
+                                                   'sbu_list', 'competitor_list', 'competitors')
+                render_leaderboard(stats, 'Business Unit', "sbu_board")
+            else:
+                # Filter articles for selected SBU within the date range, newest first
+                with span('filtering', 'business_units'):
+                    sbu_articles = entity_articles(df, st.session_state.entity_codes, 'sbu_list',
+                                                   selected_sbu, start_date, end_date)
+                
+                # Summary cards are lookups into the stats table unless a date range is active
+                with span('aggregation', 'sbu_cards'):
+                    if all_time:
+                        card_stats = stats.loc[selected_sbu]
+                        subtext = activity_subtext(card_stats)
+                    else:
+                        card_stats = range_entity_stats(sbu_articles, 'competitor_list', 'competitors')
+                        subtext = None
+                
+                render_summary_cards([
+                    ("Total Articles", card_stats['articles'], subtext),
+                    ("Competitors Mentioned", card_stats['competitors'], None),
+                    ("News Categories", card_stats['categories'], None),
+                    ("News Sources", card_stats['sources'], None)
+                ])
+                
+                # Show articles table
+                st.markdown("<br><br>", unsafe_allow_html=True)
+                st.markdown(f"### 📰 Recent Articles - {selected_sbu}")
+            
+                if len(sbu_articles) > 0:
+                    with span('rendering', 'sbu_table'):
+                        display_df = format_display(sbu_articles, ARTICLE_TABLE)
+                    
+                        st.dataframe(display_df, use_container_width=True, hide_index=True)
+                    render_export(df, sbu_articles.index, ARTICLE_TABLE, selected_sbu, "sbu")
+                else:
+                    st.info("No articles found for this BU")
         else:
-            st.info("No articles match your filters")
-    else:
-        st.info("Upload an Excel file to get started")
+            st.info("Upload an Excel file to get started")
 
-# ═════════════════════════════════════════════════════════════════
-# FILE UPLOADER (Always at bottom)
-# ═════════════════════════════════════════════════════════════════
-st.markdown("<br><br>", unsafe_allow_html=True)
-st.markdown("---")
+    # ═════════════════════════════════════════════════════════════════
+    # INDUSTRY UPDATES TAB
+    # ═════════════════════════════════════════════════════════════════
+    with tab4:
+        if st.session_state.raw_data is not None:
+            df = st.session_state.raw_data
+            
+            st.markdown("### 📰 All Industry Updates")
+            
+            # Filters
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                competitor_filter = st.selectbox("Competitor", 
+                                                ["All"] + list(st.session_state.summary_stats['competitor'].index),
+                                                key="ind_comp")
+            
+            with col2:
+                unique_categories = df['category'].unique()
+                category_filter = st.selectbox("News Type", 
+                                              ["All"] + sorted(list(unique_categories)),
+                                              key="ind_cat")
+            
+            with col3:
+                sbu_filter = st.selectbox("Business Unit", 
+                                         ["All"] + list(st.session_state.summary_stats['sbu'].index),
+                                         key="ind_sbu")
 
-uploaded_file = st.file_uploader("Browse for files", type=['xlsx', 'xls'])
+            with col4:
+                start_date, end_date = select_date_range("ind")
 
-if uploaded_file is not None:
-    try:
-        df = pd.read_excel(uploaded_file)
-        
-        # Process data
-        processed_data = []
-        for _, row in df.iterrows():
-            sbu_list = str(row.get('SBU', '')).split(',') if pd.notna(row.get('SBU')) else []
-            sbu_list = [s.strip() for s in sbu_list if s.strip()]
-            
-            comp_list = str(row.get('Competitor', '')).split(',') if pd.notna(row.get('Competitor')) else []
-            comp_list = [c.strip() for c in comp_list if c.strip()]
-            
-            processed_data.append({
-                'keyword': str(row.get('keyword', '')).strip(),
-                'newstitle': str(row.get('newstitle', 'No title'))[:200],
-                'summary': str(row.get('summary', 'No summary available'))[:300],
-                'sbu_list': sbu_list,
-                'competitor_list': comp_list,
-                'publishedate': pd.to_datetime(row.get('publishedate', datetime.now())),
-                'source': str(row.get('source', 'Unknown')).strip(),
-                'category': str(row.get('category', 'Other')).strip()
-            })
-        
-        st.session_state.raw_data = pd.DataFrame(processed_data)
-        st.session_state.filtered_data = st.session_state.raw_data.copy()
-        
-        st.success(f"✅ File uploaded successfully! {len(processed_data)} articles loaded.")
-        st.rerun()
+            # Apply filters, starting from the date range block (newest first)
+            with span('filtering', 'industry_updates'):
+                filtered_df = filter_articles(df, st.session_state.entity_codes,
+                                              competitor=None if competitor_filter == "All" else competitor_filter,
+                                              category=None if category_filter == "All" else category_filter,
+                                              sbu=None if sbu_filter == "All" else sbu_filter,
+                                              start=start_date, end=end_date)
+            
+            # Show articles
+            st.markdown("<br>", unsafe_allow_html=True)
+            
+            if len(filtered_df) > 0:
+                with span('rendering', 'industry_table'):
+                    display_df = format_display(filtered_df, ARTICLE_TABLE)
+                
+                    st.dataframe(display_df, use_container_width=True, hide_index=True)
+                render_export(df, filtered_df.index, ARTICLE_TABLE, "industry_updates", "ind")
+            else:
+                st.info("No articles match your filters")
+        else:
+            st.info("Upload an Excel file to get started")
+
+    # ═════════════════════════════════════════════════════════════════
+    # FILE UPLOADER (Always at bottom)
+    # ═════════════════════════════════════════════════════════════════
+    st.markdown("<br><br>", unsafe_allow_html=True)
+    st.markdown("---")
+
+    uploaded_file = st.file_uploader("Browse for files", type=['xlsx', 'xls'])
+
+    # The widget keeps its file across reruns, so only a newly uploaded file is ingested
+    if uploaded_file is not None and uploaded_file.file_id != st.session_state.upload_id:
+        try:
+            # Read every sheet, normalizing each one separately
+            with span('ingest', 'upload'):
+                sheets = pd.read_excel(uploaded_file, sheet_name=None)
+            
+                # Uploads stay private to this session; the shared store only serves the default workbooks
+                dataset = Dataset(merge_articles([prepare_articles(df) for df in sheets.values()]))
+                set_dataset(dataset)
+                queue_summaries(dataset)
+            st.session_state.upload_id = uploaded_file.file_id
+            
+            st.success(f"✅ File uploaded successfully! {len(st.session_state.raw_data)} articles loaded.")
+            st.rerun()
+            
+        except Exception as e:
+            st.error(f"Error loading file: {str(e)}")
+
+    if st.session_state.raw_data is not None:
+        total_articles = len(st.session_state.raw_data)
+        st.markdown(f"<div style='color: #666; font-size: 12px; margin-top: 16px;'>✓ Data Synced • {total_articles} articles loaded</div>", unsafe_allow_html=True)
         
-    except Exception as e:
-        st.error(f"Error loading file: {str(e)}")
+        ingest_report = st.session_state.ingest_report
+        if ingest_report:
+            with st.expander("Ingest timing"):
+                report_df = pd.DataFrame(ingest_report, columns=['File', 'Sheet', 'Articles', 'Seconds'])
+                report_df['File'] = report_df['File'].map(os.path.basename)
+                per_file = report_df.groupby('File', sort=False)[['Articles', 'Seconds']].sum().reset_index()
+                st.dataframe(per_file.round({'Seconds': 2}), use_container_width=True, hide_index=True)
+                st.dataframe(report_df.round({'Seconds': 2}), use_container_width=True, hide_index=True)
+
+    # ═════════════════════════════════════════════════════════════════
+    # PERFORMANCE DEBUG PANEL (admin only)
+    # ═════════════════════════════════════════════════════════════════
+    def is_admin():
+        """Admins open the dashboard with ?admin=<KEC_ADMIN_TOKEN>"""
+        token = os.environ.get("KEC_ADMIN_TOKEN")
+        return bool(token) and st.query_params.get("admin") == token
+
+    def session_alive_check():
+        """A callable telling background threads whether this browser session is still open"""
+        ctx = get_script_run_ctx()
+        if ctx is None or not runtime.exists():
+            return None
+        streamlit_runtime = runtime.get_instance()
+        return lambda: streamlit_runtime.is_active_session(ctx.session_id)
+    
+    def render_debug_panel():
+        """Per-rerun stage breakdowns, span totals, Prometheus metrics and the session profiler"""
+        with st.expander("🛠 Performance Debug"):
+            enabled = st.toggle("Collect timing spans (all sessions)", value=instrumentation.is_enabled(),
+                                key="debug_spans")
+            instrumentation.set_enabled(enabled)
+            
+            reruns = instrumentation.recent_reruns()
+            if reruns:
+                st.markdown(f"**Last {len(reruns)} reruns** (ms)")
+                rerun_df = pd.DataFrame([
+                    {'Time': datetime.fromtimestamp(r['started_at']).strftime('%H:%M:%S'),
+                     'Session': r['session'],
+                     'Total': r['seconds'] * 1000,
+                     **{stage.title(): seconds * 1000 for stage, seconds in instrumentation.stage_breakdown(r).items()}}
+                    for r in reversed(reruns)
+                ])
+                st.dataframe(rerun_df.round(1), use_container_width=True, hide_index=True)
+                
+                span_df = pd.DataFrame([
+                    {'Stage': stage, 'Span': name, 'Calls': calls,
+                     'Total (ms)': seconds * 1000, 'Mean (ms)': seconds * 1000 / calls}
+                    for (stage, name), (calls, seconds) in instrumentation.span_totals().items()
+                ]).sort_values('Total (ms)', ascending=False)
+                st.markdown("**Span totals since start**")
+                st.dataframe(span_df.round(2), use_container_width=True, hide_index=True)
+            else:
+                st.info("No reruns recorded yet")
+            
+            metrics = instrumentation.prometheus_metrics()
+            st.download_button("Download Prometheus metrics", data=metrics, file_name="kec_metrics.prom",
+                               mime="text/plain", key="debug_metrics")
+            
+            # Sampling profiler for this session only
+            profiling = st.toggle("Profile this session", value=st.session_state.profiler is not None,
+                                  key="debug_profile")
+            if profiling and st.session_state.profiler is None:
+                st.session_state.profiler = instrumentation.SamplingProfiler(alive=session_alive_check())
+                st.session_state.profiler.attach(threading.get_ident())
+                st.session_state.profiler.start()
+            elif not profiling and st.session_state.profiler is not None:
+                st.session_state.profiler.stop()
+                st.session_state.profiler = None
+            
+            profiler = st.session_state.profiler
+            if profiler is not None and profiler.samples:
+                st.markdown(f"**Hot functions** ({profiler.samples} samples)")
+                st.dataframe(pd.DataFrame(profiler.top_functions(), columns=['Function', 'Self', 'Total']),
+                             use_container_width=True, hide_index=True)
+                st.download_button("Download collapsed stacks", data=profiler.collapsed(),
+                                   file_name=f"profile_{st.session_state.session_id}.txt",
+                                   mime="text/plain", key="debug_stacks")
 
-if st.session_state.raw_data is not None:
-    total_articles = len(st.session_state.raw_data)
-    st.markdown(f"<div style='color: #666; font-size: 12px; margin-top: 16px;'>✓ Data Synced • {total_articles} articles loaded</div>", unsafe_allow_html=True)
+    if is_admin():
+        render_debug_panel()
+finally:
+    # Runs even when st.rerun() or an error cuts the script short
+    instrumentation.end_rerun()
+    if st.session_state.profiler is not None:
+        st.session_state.profiler.detach()
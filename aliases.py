@@ -0,0 +1,137 @@
+import json
+import os
+import re
+import threading
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:  # fall back to the standard library matcher
+    fuzz = process = None
+    import difflib
+
+ALIAS_FILE = os.environ.get('KEC_ALIAS_FILE',
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'entity_aliases.json'))
+
+ENTITY_KINDS = ['competitors', 'sbus']
+
+FUZZY_CUTOFF = 90
+
+# Trailing words that never distinguish one company from another
+_SUFFIXES = {'limited', 'ltd', 'pvt', 'private', 'inc', 'corp', 'corporation', 'co', 'plc', 'llc'}
+
+def normalize_name(name):
+    """Lookup key for a name: lowercase, '&' spelled out, punctuation and legal suffixes dropped"""
+    key = name.lower().replace('&', ' and ')
+    words = re.sub(r'[^a-z0-9]+', ' ', key).split()
+    while len(words) > 1 and words[-1] in _SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+class AliasResolver:
+    """Maps raw entity names to canonical ones.
+
+    The alias file is compiled into a normalized-key table once; names it does
+    not cover go through a fuzzy match against that table. Each distinct raw
+    string is matched against the file at most once per process.
+
+    Names that match nothing in the file are grouped with each other per
+    ingest, and each group is named after its most frequent spelling (ties go
+    to the alphabetically first). That choice depends only on the articles and
+    the alias file, never on what this process happened to see earlier, so
+    every process derives the same names and dataset version.
+    """
+
+    def __init__(self, alias_file=ALIAS_FILE):
+        self.alias_file = alias_file
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._load()
+
+    def _load(self):
+        aliases = {}
+        if os.path.exists(self.alias_file):
+            self._mtime = os.path.getmtime(self.alias_file)
+            with open(self.alias_file, encoding='utf-8') as f:
+                aliases = json.load(f)
+
+        self._tables = {}
+        for kind in ENTITY_KINDS:
+            table = {}
+            for canonical, variants in aliases.get(kind, {}).items():
+                for variant in [canonical] + variants:
+                    table[normalize_name(variant)] = canonical
+            self._tables[kind] = table
+        self._memo = {kind: {} for kind in ENTITY_KINDS}
+
+    def refresh(self):
+        """Recompile the table (and forget memoized answers) if the alias file changed"""
+        mtime = os.path.getmtime(self.alias_file) if os.path.exists(self.alias_file) else None
+        if mtime != self._mtime:
+            with self._lock:
+                self._load()
+
+    def _match(self, key, kind):
+        """Canonical name from the alias file for a normalized key, or None"""
+        table = self._tables[kind]
+        canonical = table.get(key)
+        if canonical is None and key:
+            canonical = _fuzzy_match(key, table)
+        return canonical
+
+    def resolve_many(self, counts, kind):
+        """{raw: canonical} for a {raw name: number of mentions} mapping taken from one ingest"""
+        memo = self._memo[kind]
+        with self._lock:
+            for raw in counts:
+                if raw not in memo:
+                    memo[raw] = self._match(normalize_name(raw), kind)
+            resolved = {raw: memo[raw] for raw in counts}
+
+        # Group the leftovers among themselves, most mentioned spelling first
+        groups = {}
+        for raw in sorted((raw for raw, canonical in resolved.items() if canonical is None),
+                          key=lambda raw: (-counts[raw], raw.strip())):
+            key = normalize_name(raw)
+            canonical = groups.get(key) or (_fuzzy_match(key, groups) if key else None)
+            if canonical is None:
+                canonical = raw.strip()
+            if key:
+                groups.setdefault(key, canonical)
+            resolved[raw] = canonical
+        return resolved
+
+    def lookup(self, raw, kind, names=()):
+        """Canonical name for a query-string value, without remembering anything.
+
+        Tries the alias file, then the canonical names of the loaded dataset
+        (`names`); returns the stripped input if neither matches.
+        """
+        key = normalize_name(raw)
+        canonical = self._match(key, kind)
+        if canonical is None and key:
+            known = {normalize_name(name): name for name in names}
+            canonical = known.get(key) or _fuzzy_match(key, known)
+        return canonical if canonical is not None else raw.strip()
+
+def _fuzzy_match(key, table):
+    """Value of the closest key in table scoring at least FUZZY_CUTOFF, or None"""
+    if not table:
+        return None
+    if process is not None:
+        match = process.extractOne(key, list(table), scorer=fuzz.token_sort_ratio, score_cutoff=FUZZY_CUTOFF)
+        return table[match[0]] if match else None
+    matches = difflib.get_close_matches(key, list(table), n=1, cutoff=FUZZY_CUTOFF / 100)
+    return table[matches[0]] if matches else None
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+def get_resolver():
+    """Return the process-wide resolver, picking up alias file edits"""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = AliasResolver()
+        else:
+            _resolver.refresh()
+    return _resolver
@@ -0,0 +1,124 @@
+"""Time ingest, facet building, each tab's filter path and table formatting.
+
+    python -m benchmarks.bench_pipeline --sizes 1k 10k 100k
+    python -m benchmarks.bench_pipeline --sizes 100k --files 4 --sheets 3 --workers 1 2 4 8
+    python -m benchmarks.bench_pipeline --compare benchmarks/results/old.json
+
+Ingest is timed once per --workers value, so split workbooks show how the
+process pool scales.
+"""
+import argparse
+import json
+import os
+from datetime import timedelta
+
+from benchmarks.common import SIZES, run_metadata, save_results, time_call, workbook_path
+from data_store import (build_entity_codes, build_summary_stats, date_range_rows, entity_articles, filter_articles,
+                        latest_articles, load_workbooks)
+from exports import ARTICLE_TABLE, COMPETITOR_TABLE, format_display
+
+def most_common(stats):
+    return stats['articles'].idxmax()
+
+def default_workers():
+    """1, 2, 4, ... up to the core count, which is always included"""
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 < cores:
+        counts.append(counts[-1] * 2)
+    return sorted(set(counts + [cores]))
+
+def filter_paths(articles, codes, stats):
+    """The filter work each tab does on a rerun, with the busiest selections"""
+    competitor = most_common(stats['competitor'])
+    sbu = most_common(stats['sbu'])
+    category = articles['category'].mode().iloc[0]
+    end = articles['publishedate'].max().date()
+    start = end - timedelta(days=30)
+
+    return {
+        'executive_summary': lambda: latest_articles(articles, codes, competitor=competitor, category=category),
+        'competitors_tab': lambda: entity_articles(articles, codes, 'competitor_list', competitor),
+        'bu_tab': lambda: entity_articles(articles, codes, 'sbu_list', sbu),
+        'industry_all': lambda: filter_articles(articles, codes),
+        'industry_filtered': lambda: filter_articles(articles, codes, competitor=competitor, category=category, sbu=sbu),
+        'industry_last_30_days': lambda: filter_articles(articles, codes, start=start, end=end),
+        'date_range_slice': lambda: date_range_rows(articles, start, end)
+    }
+
+def bench_size(label, repeats, files=1, sheets=1, workers=(1,)):
+    path = workbook_path(label, files, sheets)
+    if not os.path.exists(path):
+        raise SystemExit(f"{path} is missing; run python -m benchmarks.synthetic_data --sizes {label} "
+                         f"--files {files} --sheets {sheets}")
+
+    results = {'rows': SIZES[label], 'files': files, 'sheets': sheets}
+
+    # Ingest is the slowest stage by far, so it is only timed once per worker count
+    results['ingest'] = {}
+    for count in workers:
+        results['ingest'][f'{count}_workers'], (articles, _) = time_call(
+            lambda: load_workbooks(path, max_workers=count), 1)
+    results['entity_codes'], codes = time_call(lambda: build_entity_codes(articles), repeats)
+    results['facets'], stats = time_call(lambda: build_summary_stats(articles, codes), repeats)
+    results['facets_category_list'], _ = time_call(lambda: sorted(articles['category'].unique()), repeats)
+
+    results['filters'] = {}
+    for name, func in filter_paths(articles, codes, stats).items():
+        results['filters'][name], _ = time_call(func, repeats)
+
+    everything = filter_articles(articles, codes)
+    competitor_rows = filter_paths(articles, codes, stats)['competitors_tab']()
+    results['formatting'] = {
+        'industry_table': time_call(lambda: format_display(everything, ARTICLE_TABLE), repeats)[0],
+        'competitor_table': time_call(lambda: format_display(competitor_rows, COMPETITOR_TABLE), repeats)[0]
+    }
+    return results
+
+def flatten(results, prefix=''):
+    """Map 'size/stage/...' keys to median milliseconds"""
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict) and 'median_ms' in value:
+            flat[prefix + key] = value['median_ms']
+        elif isinstance(value, dict):
+            flat.update(flatten(value, f'{prefix}{key}/'))
+    return flat
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old = flatten(baseline['results'])
+    new = flatten(current['results'])
+    print(f"\nvs {baseline['meta']['commit']} ({baseline_path})")
+    for key in sorted(new):
+        if key in old and old[key] > 0:
+            print(f"  {key:55s} {old[key]:10.2f} -> {new[key]:10.2f} ms  ({new[key] / old[key]:.2f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=['1k', '10k', '100k'])
+    parser.add_argument('--files', type=int, default=1, help='Read the size split over this many workbooks')
+    parser.add_argument('--sheets', type=int, default=1, help='Sheets per workbook when reading a split size')
+    parser.add_argument('--workers', nargs='+', type=int, default=default_workers(),
+                        help='Ingest process counts to time (default: powers of two up to the core count)')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/pipeline_<commit>_<time>.json)')
+    parser.add_argument('--compare', help='Earlier result file to compare against')
+    args = parser.parse_args()
+
+    payload = {'meta': run_metadata(), 'results': {}}
+    for label in args.sizes:
+        # Split layouts get their own key, so --compare only lines up like with like
+        name = label if args.files == args.sheets == 1 else f'{label}_{args.files}x{args.sheets}'
+        print(f"Benchmarking {name}...")
+        payload['results'][name] = bench_size(label, args.repeats, args.files, args.sheets, args.workers)
+        for key, median in flatten(payload['results'][name]).items():
+            print(f"  {key:45s} {median:10.2f} ms")
+
+    print(f"Saved {save_results('pipeline', payload, args.output)}")
+    if args.compare:
+        compare(payload, args.compare)
+
+if __name__ == '__main__':
+    main()
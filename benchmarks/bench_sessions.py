@@ -0,0 +1,184 @@
+"""Drive concurrent dashboard sessions against a real Streamlit server and measure rerun latency.
+
+Starts the app with ``streamlit run`` and connects N simulated browser
+sessions to it over Streamlit's websocket protocol, so every session shares
+one server process, its article store and its GIL, as in production.
+--processes starts several servers and spreads the sessions across them.
+The first run on each server pays for the shared ingest and is reported on
+its own, apart from the rerun latencies.
+
+    python -m benchmarks.bench_sessions --size 10k --sessions 8 --reruns 30
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tornado.websocket import websocket_connect
+
+from benchmarks.common import (REPO_ROOT, SIZES, peak_rss_mb, percentile, run_metadata, save_results,
+                               workbook_path)
+
+APP_PATH = os.path.join(REPO_ROOT, 'Competitor Intel App.py')
+BASE_PORT = 8611
+
+# Filter widgets a user is likely to touch, by selectbox key
+WIDGET_KEYS = ['exec_comp', 'exec_cat', 'exec_sbu', 'exec_range', 'comp_select', 'comp_range',
+               'sbu_select', 'sbu_range', 'ind_comp', 'ind_cat', 'ind_sbu', 'ind_range']
+
+# ═════════════════════════════════════════════════════════════════
+# SERVERS
+# ═════════════════════════════════════════════════════════════════
+def start_server(port, data_source):
+    # Background summarization would compete with the reruns being measured and write a cache
+    # into the repo, making cold- and warm-cache runs incomparable
+    env = dict(os.environ, KEC_DATA_SOURCE=data_source, KEC_SUMMARIES='0')
+    server = subprocess.Popen([sys.executable, '-m', 'streamlit', 'run', APP_PATH,
+                               '--server.headless', 'true', '--server.port', str(port),
+                               '--browser.gatherUsageStats', 'false'],
+                              cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise SystemExit(f"Streamlit did not start on port {port}")
+
+# ═════════════════════════════════════════════════════════════════
+# SIMULATED BROWSER SESSIONS
+# ═════════════════════════════════════════════════════════════════
+class Session:
+    """One browser tab: a websocket that sends reruns with widget state, like the frontend"""
+
+    def __init__(self, port):
+        self.url = f'ws://127.0.0.1:{port}/_stcore/stream'
+        self.selectboxes = {}
+        self.widget_values = {}
+        self.errors = 0
+
+    async def connect(self):
+        self.conn = await websocket_connect(self.url, max_message_size=1 << 30)
+
+    async def run(self):
+        """Send one rerun and return its wall time in milliseconds once the script finishes"""
+        msg = BackMsg()
+        msg.rerun_script.SetInParent()
+        for widget_id, value in self.widget_values.items():
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            state.string_value = value
+
+        started = time.perf_counter()
+        await self.conn.write_message(msg.SerializeToString(), binary=True)
+        while True:
+            data = await self.conn.read_message()
+            if data is None:
+                raise ConnectionError("Streamlit closed the session")
+            forward = ForwardMsg.FromString(data)
+            kind = forward.WhichOneof('type')
+            if kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                self._record(forward.delta.new_element)
+            elif kind == 'script_finished':
+                return (time.perf_counter() - started) * 1000
+
+    def _record(self, element):
+        kind = element.WhichOneof('type')
+        if kind == 'exception':
+            self.errors += 1
+        elif kind == 'selectbox':
+            # Widget ids end with the user-supplied key
+            key = element.selectbox.id.rsplit('-', 1)[-1]
+            self.selectboxes[key] = (element.selectbox.id, list(element.selectbox.options))
+
+    def change_random_filter(self, rng):
+        widget_id, options = self.selectboxes[rng.choice([k for k in WIDGET_KEYS if k in self.selectboxes])]
+        # The custom range needs a date picker interaction, which is not simulated
+        self.widget_values[widget_id] = rng.choice([o for o in options if o != 'Custom Range'])
+
+    def close(self):
+        self.conn.close()
+
+async def run_session(session_id, port, reruns, seed):
+    rng = random.Random(seed + session_id)
+    session = Session(port)
+    await session.connect()
+    first_run_ms = await session.run()
+
+    latencies = []
+    for _ in range(reruns):
+        session.change_random_filter(rng)
+        latencies.append(await session.run())
+    session.close()
+
+    return {'session': session_id, 'port': port, 'first_run_ms': first_run_ms,
+            'latencies_ms': latencies, 'errors': session.errors}
+
+async def run_load(ports, sessions, reruns, seed):
+    # One session per server loads the shared store, so ingest is timed apart from the reruns
+    cold_starts = {}
+    for port in ports:
+        session = Session(port)
+        await session.connect()
+        cold_starts[port] = await session.run()
+        session.close()
+
+    results = await asyncio.gather(*[run_session(i, ports[i % len(ports)], reruns, seed)
+                                     for i in range(sessions)])
+    return cold_starts, results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', choices=list(SIZES), default='10k')
+    parser.add_argument('--sessions', type=int, default=4, help='Concurrent sessions across all servers')
+    parser.add_argument('--processes', type=int, default=1, help='Streamlit server processes')
+    parser.add_argument('--reruns', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/sessions_<commit>_<time>.json)')
+    args = parser.parse_args()
+
+    data_source = workbook_path(args.size)
+    if not os.path.exists(data_source):
+        raise SystemExit(f"{data_source} is missing; run python -m benchmarks.synthetic_data --sizes {args.size}")
+
+    ports = [BASE_PORT + i for i in range(args.processes)]
+    servers = [start_server(port, data_source) for port in ports]
+    try:
+        cold_starts, sessions = asyncio.run(run_load(ports, args.sessions, args.reruns, args.seed))
+        memory = [peak_rss_mb(server.pid) for server in servers]
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+    latencies = [ms for session in sessions for ms in session['latencies_ms']]
+    memory = [mb for mb in memory if mb is not None]
+    summary = {
+        'size': args.size,
+        'processes': args.processes,
+        'sessions': args.sessions,
+        'reruns_per_session': args.reruns,
+        'cold_start_max_ms': max(cold_starts.values()),
+        'first_run_p50_ms': percentile([s['first_run_ms'] for s in sessions], 50),
+        'rerun_p50_ms': percentile(latencies, 50) if latencies else None,
+        'rerun_p95_ms': percentile(latencies, 95) if latencies else None,
+        'rerun_max_ms': max(latencies) if latencies else None,
+        'server_peak_rss_mb_max': max(memory) if memory else None,
+        'errors': sum(s['errors'] for s in sessions)
+    }
+
+    for key, value in summary.items():
+        print(f"  {key:22s} {value:.2f}" if isinstance(value, float) else f"  {key:22s} {value}")
+    payload = {'meta': run_metadata(), 'results': summary, 'cold_starts_ms': cold_starts, 'sessions': sessions}
+    print(f"Saved {save_results('sessions', payload, args.output)}")
+
+if __name__ == '__main__':
+    main()
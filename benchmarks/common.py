@@ -0,0 +1,76 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+DATA_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'data')
+
+SIZES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+# Benchmarks import the dashboard modules straight from the repo root
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+def workbook_path(size_label, files=1, sheets=1):
+    """The workbook for a size, or the directory of workbooks when it is split into files and sheets"""
+    if files == 1 and sheets == 1:
+        return os.path.join(DATA_DIR, f'articles_{size_label}.xlsx')
+    return os.path.join(DATA_DIR, f'articles_{size_label}_{files}x{sheets}')
+
+def run_metadata():
+    """Describe the code and machine a result was produced on"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def time_call(func, repeats):
+    """Call func repeats times; return timing summary in milliseconds and the last result"""
+    timings = []
+    result = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {'min_ms': min(timings), 'median_ms': statistics.median(timings), 'runs': repeats}, result
+
+def peak_rss_mb(pid):
+    """Peak resident memory of a process in MB, or None where unsupported (non-Linux)"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def save_results(name, payload, output=None):
+    """Write a result file and return its path"""
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output = os.path.join(RESULTS_DIR, f'{name}_{payload["meta"]["commit"] or "nogit"}_{stamp}.json')
+    with open(output, 'w') as f:
+        json.dump(payload, f, indent=2, default=str)
+    return output
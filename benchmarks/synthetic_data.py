@@ -0,0 +1,95 @@
+"""Generate synthetic workbooks matching the competitor_data.xlsx schema.
+
+    python -m benchmarks.synthetic_data --sizes 1k 10k 100k 1m
+    python -m benchmarks.synthetic_data --sizes 100k --files 4 --sheets 3
+
+With --files/--sheets the rows are split over a directory of workbooks, so
+ingest has several sheets to spread across its process pool.
+"""
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook
+
+from benchmarks.common import DATA_DIR, SIZES, workbook_path
+
+COLUMNS = ['keyword', 'newstitle', 'summary', 'SBU', 'Competitor', 'publishedate', 'source', 'category']
+
+COMPETITORS = ['Larsen & Toubro Limited', 'Rail Vikas Nigam Limited', 'ABB', 'Bharat Heavy Electricals Limited',
+               'AFCONS Infrastructure Limited', 'NCC Limited', 'Ahluwalia Contracts (India) Limited',
+               'Tata Projects', 'Kalpataru Projects International', 'Sterling and Wilson', 'Siemens',
+               'Hitachi Energy', 'GE Vernova', 'Adani Energy Solutions', 'Power Mech Projects']
+SBUS = ['Civil', 'Global', 'India T&D', 'International T&D', 'Oil & Gas', 'Renewables', 'Transportation']
+CATEGORIES = ['Order Wins', 'Financial', 'Alliance/Partnership', 'M&A', 'Industry', 'Stock Market', 'Other']
+SOURCES = ['Business Standard', 'The Economic Times', 'livemint.com', 'Construction World', 'ZAWYA',
+           'Metro Rail News', 'T&D India', 'Saur Energy', 'CNBC TV18', 'The Hindu', 'NDTV Profit',
+           'Press Trust Of India', 'Renewables Now', 'Bloomberg.com', 'MarketScreener']
+KEYWORDS = ['substation', 'distribution', 'order win', 'bess', 'capex', 'contract', 'ohe', 'order book',
+            'solar power plant', 'medium voltage', 'investment', 'upgradation', 'loi', 'make in india']
+WORDS = ['secures', 'project', 'contract', 'worth', 'crore', 'order', 'transmission', 'metro', 'line',
+         'substation', 'grid', 'expansion', 'quarter', 'revenue', 'growth', 'awarded', 'tender', 'rail',
+         'pipeline', 'renewable', 'capacity', 'partnership', 'international', 'shares', 'gain']
+
+def generate_rows(count, seed=42, days=3 * 365):
+    """Yield count deterministic article rows spread over the last `days` days"""
+    rng = random.Random(seed)
+    newest = datetime(2025, 11, 1)
+    for _ in range(count):
+        competitors = rng.sample(COMPETITORS, k=rng.choice([1, 1, 1, 2, 3]))
+        sbus = rng.sample(SBUS, k=rng.choice([1, 1, 2, 3, 5]))
+        title = f"{competitors[0]} {' '.join(rng.choices(WORDS, k=rng.randint(6, 14)))}"
+        yield [
+            rng.choice(KEYWORDS),
+            title,
+            ' '.join(rng.choices(WORDS, k=rng.randint(30, 80))),
+            ', '.join(sbus),
+            ', '.join(competitors),
+            newest - timedelta(minutes=rng.randint(0, days * 24 * 60)),
+            rng.choice(SOURCES),
+            rng.choice(CATEGORIES)
+        ]
+
+def write_workbook(path, count, seed=42, sheets=1):
+    """Stream count synthetic rows into a workbook, split evenly over `sheets` sheets"""
+    workbook = Workbook(write_only=True)
+    rows = generate_rows(count, seed)
+    for index in range(sheets):
+        sheet = workbook.create_sheet(f'Sheet{index + 1}')
+        sheet.append(COLUMNS)
+        for _ in range(count // sheets + (index < count % sheets)):
+            sheet.append(next(rows))
+    workbook.save(path)
+
+def write_split(directory, count, files, sheets, seed=42):
+    """Spread count rows over `files` workbooks of `sheets` sheets each"""
+    os.makedirs(directory, exist_ok=True)
+    for index in range(files):
+        # Different seeds per file so the files do not repeat each other
+        write_workbook(os.path.join(directory, f'part_{index + 1:02d}.xlsx'),
+                       count // files + (index < count % files), seed + index, sheets)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=list(SIZES))
+    parser.add_argument('--files', type=int, default=1, help='Number of workbooks to split each size over')
+    parser.add_argument('--sheets', type=int, default=1, help='Number of sheets per workbook')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--force', action='store_true', help='Regenerate existing workbooks')
+    args = parser.parse_args()
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    for label in args.sizes:
+        path = workbook_path(label, args.files, args.sheets)
+        if os.path.exists(path) and not args.force:
+            print(f"{path} exists, skipping")
+            continue
+        if args.files == 1 and args.sheets == 1:
+            write_workbook(path, SIZES[label], args.seed)
+        else:
+            write_split(path, SIZES[label], args.files, args.sheets, args.seed)
+        print(f"Wrote {SIZES[label]} rows to {path} ({args.files} files x {args.sheets} sheets)")
+
+if __name__ == '__main__':
+    main()
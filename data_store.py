@@ -0,0 +1,403 @@
+import glob
+import hashlib
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import types
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from aliases import get_resolver
+from instrumentation import span
+
+# ═════════════════════════════════════════════════════════════════
+# ARTICLE SCHEMA
+# ═════════════════════════════════════════════════════════════════
+ARTICLE_COLUMNS = ['keyword', 'newstitle', 'summary', 'sbu_list', 'competitor_list',
+                   'publishedate', 'source', 'category', 'source_title', 'source_text', 'content_hash']
+
+# Untruncated title and text kept for the summarizer; not part of any table or API row
+SOURCE_COLUMNS = ['source_title', 'source_text']
+
+LIST_COLUMNS = ['sbu_list', 'competitor_list']
+
+# Which alias table resolves each list column
+ENTITY_COLUMNS = {'competitor_list': 'competitors', 'sbu_list': 'sbus'}
+
+WORKBOOK_EXTENSIONS = ('.xlsx', '.xls')
+
+# Day zero of Excel's serial date numbers (1900 date system)
+EXCEL_EPOCH = '1899-12-30'
+
+# ═════════════════════════════════════════════════════════════════
+# INGEST
+# ═════════════════════════════════════════════════════════════════
+def content_hash(title, text):
+    """Identity of an article's content, used as the summary cache key"""
+    return hashlib.sha256(f"{title}\n{text}".encode('utf-8')).hexdigest()[:32]
+
+def parse_publish_date(value):
+    """Timestamp for a publishedate cell; bare numbers are Excel serial dates (days since EXCEL_EPOCH)"""
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        # Float day fractions carry sub-millisecond noise; Excel itself stores milliseconds
+        return pd.to_datetime(value, unit='D', origin=EXCEL_EPOCH).round('ms')
+    return pd.to_datetime(value)
+
+def prepare_articles(df):
+    """Normalize raw Excel rows into the article table used by every tab"""
+    processed_data = []
+    for _, row in df.iterrows():
+        sbu_list = str(row.get('SBU', '')).split(',') if pd.notna(row.get('SBU')) else []
+        sbu_list = [s.strip() for s in sbu_list if s.strip()]
+
+        comp_list = str(row.get('Competitor', '')).split(',') if pd.notna(row.get('Competitor')) else []
+        comp_list = [c.strip() for c in comp_list if c.strip()]
+
+        # Full texts are kept for the summarizer; the truncated ones are display fallbacks
+        title = str(row.get('newstitle', 'No title'))
+        text = str(row.get('summary', 'No summary available'))
+
+        processed_data.append({
+            'keyword': str(row.get('keyword', '')).strip(),
+            'newstitle': title[:200],
+            'summary': text[:300],
+            'sbu_list': sbu_list,
+            'competitor_list': comp_list,
+            'publishedate': parse_publish_date(row.get('publishedate', datetime.now())),
+            'source': str(row.get('source', 'Unknown')).strip(),
+            'category': str(row.get('category', 'Other')).strip(),
+            'source_title': title,
+            'source_text': text,
+            'content_hash': content_hash(title, text)
+        })
+
+    articles = pd.DataFrame(processed_data, columns=ARTICLE_COLUMNS)
+    articles['publishedate'] = pd.to_datetime(articles['publishedate'])
+
+    # Presort by publish date (oldest first) so date ranges become a binary search
+    return articles.sort_values('publishedate', kind='stable').reset_index(drop=True)
+
+def merge_articles(parts):
+    """Combine separately prepared article tables, keeping the publish date order"""
+    if not parts:
+        return prepare_articles(pd.DataFrame())
+    articles = resolve_aliases(pd.concat(parts, ignore_index=True))
+    return articles.sort_values('publishedate', kind='stable').reset_index(drop=True)
+
+def resolve_aliases(articles):
+    """Replace raw competitor/SBU names with canonical ones from the alias resolver.
+
+    Only the distinct raw strings are resolved (with their mention counts,
+    which pick the canonical spelling for names the alias file does not
+    cover); the lists are then rewritten by dictionary lookup.
+    """
+    resolver = get_resolver()
+    with span('ingest', 'resolve_aliases'):
+        for col, kind in ENTITY_COLUMNS.items():
+            mentions = Counter(name for names in articles[col] for name in names)
+            canonical = resolver.resolve_many(mentions, kind)
+            # dict.fromkeys drops names that collapse onto the same entity, keeping order
+            articles[col] = [list(dict.fromkeys(canonical[name] for name in names)) for names in articles[col]]
+    return articles
+
+def find_workbooks(source):
+    """Expand a workbook path, directory or glob pattern into a sorted list of files"""
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source)
+    # Skip Excel's "~$" lock files left behind by open workbooks
+    return sorted(p for p in paths
+                  if p.lower().endswith(WORKBOOK_EXTENSIONS) and not os.path.basename(p).startswith('~$'))
+
+def _load_sheet(part):
+    """Process pool worker: read and normalize one sheet of one workbook"""
+    path, sheet_name = part
+    started = time.perf_counter()
+    articles = prepare_articles(pd.read_excel(path, sheet_name=sheet_name))
+    return path, sheet_name, articles, time.perf_counter() - started
+
+_main_lock = threading.Lock()
+
+@contextmanager
+def _bare_main():
+    """Hide __main__ from worker processes spawned inside this block.
+
+    A spawned process re-imports the parent's __main__ before it runs any
+    task. Under Streamlit that is the dashboard script itself, so without
+    this every ingest worker would run the whole app first.
+    """
+    with _main_lock:
+        main = sys.modules.get('__main__')
+        sys.modules['__main__'] = types.ModuleType('__main__')
+        try:
+            yield
+        finally:
+            sys.modules['__main__'] = main
+
+def load_workbooks(source, max_workers=None):
+    """Load every sheet of every workbook matched by source, in parallel across processes.
+
+    Returns the merged article table and an ingest report with one
+    (path, sheet, rows, seconds) entry per sheet.
+    """
+    paths = find_workbooks(source)
+    parts = []
+    for path in paths:
+        with pd.ExcelFile(path) as workbook:
+            parts.extend((path, sheet_name) for sheet_name in workbook.sheet_names)
+
+    with span('ingest', 'parse_sheets'):
+        workers = min(len(parts), max_workers or os.cpu_count() or 1)
+        # A one-process pool only adds interpreter start-up and imports, so parse in process instead
+        if workers > 1:
+            # Never fork: ingest runs inside the threaded Streamlit server, where a forked child can deadlock
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                # map() submits every sheet up front, which is when the workers start
+                with _bare_main():
+                    results = pool.map(_load_sheet, parts)
+                results = list(results)
+        else:
+            results = [_load_sheet(part) for part in parts]
+
+    report = [(path, sheet_name, len(articles), seconds) for path, sheet_name, articles, seconds in results]
+    with span('ingest', 'merge'):
+        return merge_articles([articles for _, _, articles, _ in results]), report
+
+def source_signature(source):
+    """(path, mtime, size) for every workbook matched by source; changes whenever one of them does"""
+    return tuple((path, os.path.getmtime(path), os.path.getsize(path)) for path in find_workbooks(source))
+
+def dataset_version(articles):
+    """Content hash of an article table, stable across processes and reloads"""
+    hashable = articles.drop(columns=LIST_COLUMNS).assign(
+        **{col: articles[col].str.join(',') for col in LIST_COLUMNS}
+    )
+    row_hashes = pd.util.hash_pandas_object(hashable, index=False).values
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()[:16]
+
+# ═════════════════════════════════════════════════════════════════
+# ENTITY CODES
+# ═════════════════════════════════════════════════════════════════
+class EntityCodes:
+    """Integer-coded form of a list column such as competitor_list.
+
+    Canonical names get ids in sorted order; every (article, entity) mention is
+    stored as a pair of parallel arrays, so membership tests are array scans
+    rather than Python `in` checks on each row's list.
+    """
+
+    def __init__(self, lists):
+        self.names = sorted({name for names in lists for name in names})
+        self.ids = {name: code for code, name in enumerate(self.names)}
+        lengths = np.fromiter((len(names) for names in lists), dtype=np.int64, count=len(lists))
+        self.codes = np.fromiter((self.ids[name] for names in lists for name in names),
+                                 dtype=np.int32, count=int(lengths.sum()))
+        self.rows = np.repeat(np.arange(len(lists), dtype=np.int64), lengths)
+        self.size = len(lists)
+
+    def mask(self, name):
+        """Boolean array over all articles (by position) that mention name"""
+        mask = np.zeros(self.size, dtype=bool)
+        code = self.ids.get(name)
+        if code is not None:
+            mask[self.rows[self.codes == code]] = True
+        return mask
+
+def build_entity_codes(articles):
+    return {col: EntityCodes(articles[col].tolist()) for col in ENTITY_COLUMNS}
+
+# ═════════════════════════════════════════════════════════════════
+# FILTERING
+# ═════════════════════════════════════════════════════════════════
+def date_range_rows(df, start=None, end=None):
+    """Return the contiguous block of articles published between start and end (inclusive).
+
+    Relies on the table being presorted by publishedate, so both bounds are
+    found with a binary search and the result is a plain positional slice.
+    """
+    dates = df['publishedate']
+    lo = 0 if start is None else dates.searchsorted(pd.Timestamp(start), side='left')
+    hi = len(df) if end is None else dates.searchsorted(pd.Timestamp(end) + timedelta(days=1), side='left')
+    return df.iloc[lo:hi]
+
+def _filter_mask(block, codes, competitor=None, category=None, sbu=None):
+    """Boolean array over a block of articles for the competitor, category and SBU filters"""
+    rows = block.index.values
+    keep = np.ones(len(rows), dtype=bool)
+
+    if competitor:
+        keep &= codes['competitor_list'].mask(competitor)[rows]
+
+    if category:
+        keep &= block['category'].values == category
+
+    if sbu:
+        keep &= codes['sbu_list'].mask(sbu)[rows]
+
+    return keep
+
+def filter_articles(df, codes, competitor=None, category=None, sbu=None, start=None, end=None):
+    """Apply the Industry Updates filters and return matching articles, newest first"""
+    range_df = date_range_rows(df, start, end)
+    return range_df[_filter_mask(range_df, codes, competitor, category, sbu)].iloc[::-1]
+
+def latest_articles(df, codes, competitor=None, category=None, sbu=None, start=None, end=None, limit=7):
+    """The Executive Summary's major moves: the newest `limit` articles in the range, then filtered"""
+    top = date_range_rows(df, start, end).iloc[::-1].head(limit)
+    return top[_filter_mask(top, codes, competitor, category, sbu)]
+
+def entity_articles(df, codes, entity_col, name, start=None, end=None):
+    """Articles in the date range that mention one competitor or SBU, newest first"""
+    range_df = date_range_rows(df, start, end).iloc[::-1]
+    return range_df[codes[entity_col].mask(name)[range_df.index]]
+
+def search_articles(df, query):
+    """Case-insensitive substring search over title, summary and keyword"""
+    query = query.strip()
+    if not query:
+        return df
+    matches = (df['newstitle'].str.contains(query, case=False, regex=False)
+               | df['summary'].str.contains(query, case=False, regex=False)
+               | df['keyword'].str.contains(query, case=False, regex=False))
+    return df[matches]
+
+# ═════════════════════════════════════════════════════════════════
+# SUMMARY STATISTICS
+# ═════════════════════════════════════════════════════════════════
+def build_entity_stats(df, codes, entity_col, related_col, related_name):
+    """Aggregate the summary card metrics for every competitor or SBU in one pass.
+
+    df is the article table or a block of it (such as a date range slice) and
+    codes the EntityCodes of the whole table. Mentions are grouped on their
+    integer codes, and the names only come back for the finished rows.
+    """
+    columns = ['articles', 'categories', related_name, 'sources', 'last_seen', 'last_30_days', 'delta_30_days']
+
+    entity = codes[entity_col]
+    # Position of every article within df, or -1 for articles outside the block
+    position = np.full(entity.size, -1, dtype=np.int64)
+    position[df.index.values] = np.arange(len(df))
+
+    in_block = position[entity.rows] >= 0
+    if not in_block.any():
+        return pd.DataFrame(columns=columns)
+    rows = entity.rows[in_block]
+    mentions = pd.DataFrame({
+        'entity': entity.codes[in_block],
+        'row': rows,
+        'category': df['category'].values[position[rows]],
+        'source': df['source'].values[position[rows]],
+        'publishedate': df['publishedate'].values[position[rows]]
+    })
+
+    # 30-day windows are anchored on the newest article so the table is fixed per dataset
+    latest = df['publishedate'].max()
+    mentions['recent'] = mentions['publishedate'] > latest - timedelta(days=30)
+    mentions['prior'] = (mentions['publishedate'] > latest - timedelta(days=60)) & ~mentions['recent']
+
+    # (entity, related entity) code pairs from articles that mention both
+    related = codes[related_col]
+    related_in_block = position[related.rows] >= 0
+    pairs = mentions[['entity', 'row']].merge(
+        pd.DataFrame({'row': related.rows[related_in_block], 'related': related.codes[related_in_block]}), on='row')
+
+    grouped = mentions.groupby('entity')
+    stats = pd.DataFrame({
+        'articles': grouped.size(),
+        'categories': grouped['category'].nunique(),
+        related_name: pairs.groupby('entity')['related'].nunique(),
+        'sources': grouped['source'].nunique(),
+        'last_seen': grouped['publishedate'].max(),
+        'last_30_days': grouped['recent'].sum()
+    })
+    stats[related_name] = stats[related_name].fillna(0).astype(int)
+    stats['delta_30_days'] = stats['last_30_days'] - grouped['prior'].sum()
+    # Codes follow sorted names, so the rows stay in name order
+    stats.index = pd.Index(np.array(entity.names, dtype=object)[stats.index.values], name=entity_col)
+    return stats[columns]
+
+def build_summary_stats(df, codes):
+    """Build the per-competitor and per-SBU stats tables once per loaded dataset"""
+    return {
+        'competitor': build_entity_stats(df, codes, 'competitor_list', 'sbu_list', 'business_units'),
+        'sbu': build_entity_stats(df, codes, 'sbu_list', 'competitor_list', 'competitors')
+    }
+
+def range_entity_stats(articles, related_col, related_name):
+    """Compute the summary card metrics directly from an already filtered block of articles"""
+    related = set()
+    for values in articles[related_col]:
+        related.update(values)
+    return {
+        'articles': len(articles),
+        'categories': articles['category'].nunique(),
+        related_name: len(related),
+        'sources': articles['source'].nunique()
+    }
+
+# ═════════════════════════════════════════════════════════════════
+# SHARED STORE
+# ═════════════════════════════════════════════════════════════════
+class Dataset:
+    """An immutable snapshot of loaded articles and everything derived from them"""
+
+    def __init__(self, articles, ingest_report=None, source=None):
+        self.articles = articles
+        self.ingest_report = ingest_report or []
+        # source_signature() of the workbooks this was loaded from, if any
+        self.source = source
+        with span('ingest', 'entity_codes'):
+            self.codes = build_entity_codes(articles)
+        with span('aggregation', 'summary_stats'):
+            self.stats = build_summary_stats(articles, self.codes)
+        with span('ingest', 'dataset_version'):
+            self.version = dataset_version(articles)
+        self.loaded_at = datetime.now()
+
+class ArticleStore:
+    """Process-wide holder of the current dataset, shared by the dashboard and the API"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._dataset = None
+
+    def current(self):
+        """Return the current Dataset, or None if nothing has been loaded yet"""
+        return self._dataset
+
+    def publish(self, articles, ingest_report=None, source=None):
+        """Swap in a new article table and return its Dataset snapshot"""
+        dataset = Dataset(articles, ingest_report, source)
+        with self._lock:
+            self._dataset = dataset
+        return dataset
+
+    def load(self, source):
+        """Return the dataset for the workbooks matched by source, re-reading them only if they changed.
+
+        The freshness check and the publish happen under one lock, so sessions
+        that arrive together trigger a single ingest. Returns (dataset, fresh),
+        where fresh is True if this call did the ingest.
+        """
+        with self._load_lock:
+            signature = source_signature(source)
+            dataset = self._dataset
+            if dataset is not None and dataset.source == signature:
+                return dataset, False
+            articles, report = load_workbooks(source)
+            return self.publish(articles, report, signature), True
+
+_store = ArticleStore()
+
+def get_store():
+    """Return the singleton store for this process"""
+    return _store
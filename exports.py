@@ -0,0 +1,93 @@
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+# ═════════════════════════════════════════════════════════════════
+# TABLE LAYOUT
+# ═════════════════════════════════════════════════════════════════
+COLUMN_LABELS = {
+    'newstitle': 'Title',
+    'category': 'Category',
+    'competitor_list': 'Competitors',
+    'sbu_list': 'Business Units',
+    'source': 'Source',
+    'publishedate': 'Date'
+}
+
+ARTICLE_TABLE = ['newstitle', 'category', 'competitor_list', 'source', 'publishedate']
+COMPETITOR_TABLE = ['newstitle', 'category', 'source', 'publishedate']
+
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet')
+}
+
+CHUNK_SIZE = 5000
+
+def format_display(articles, columns):
+    """Shape article rows the way the dashboard tables show them"""
+    display_df = pd.DataFrame(index=articles.index)
+    for col in columns:
+        if col in ('competitor_list', 'sbu_list'):
+            display_df[COLUMN_LABELS[col]] = articles[col].apply(lambda x: ', '.join(x) if x else 'N/A')
+        elif col == 'publishedate':
+            display_df[COLUMN_LABELS[col]] = articles[col].dt.strftime('%d %b %Y')
+        else:
+            display_df[COLUMN_LABELS[col]] = articles[col]
+    return display_df
+
+# ═════════════════════════════════════════════════════════════════
+# CHUNKED WRITERS
+# ═════════════════════════════════════════════════════════════════
+def iter_display_chunks(articles, rows, columns, chunk_size=CHUNK_SIZE):
+    """Yield formatted blocks of at most chunk_size rows, taken from articles by index label"""
+    for start in range(0, len(rows), chunk_size):
+        yield format_display(articles.loc[rows[start:start + chunk_size]], columns)
+
+def iter_csv(articles, rows, columns, chunk_size=CHUNK_SIZE):
+    """Generate the CSV export as encoded chunks, header first"""
+    yield format_display(articles.iloc[:0], columns).to_csv(index=False).encode('utf-8')
+    for chunk in iter_display_chunks(articles, rows, columns, chunk_size):
+        yield chunk.to_csv(index=False, header=False).encode('utf-8')
+
+def _xlsx_value(value):
+    """Drop the control characters openpyxl refuses to write (scraped titles contain them)"""
+    return ILLEGAL_CHARACTERS_RE.sub('', value) if isinstance(value, str) else value
+
+def write_xlsx(articles, rows, columns, sink, chunk_size=CHUNK_SIZE):
+    """Write the export through a write-only workbook, which streams rows to disk"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Articles')
+    sheet.append([COLUMN_LABELS[col] for col in columns])
+    for chunk in iter_display_chunks(articles, rows, columns, chunk_size):
+        for row in chunk.itertuples(index=False, name=None):
+            sheet.append([_xlsx_value(value) for value in row])
+    workbook.save(sink)
+
+def write_parquet(articles, rows, columns, sink, chunk_size=CHUNK_SIZE):
+    """Write the export as Parquet with one row group per chunk"""
+    schema = pa.schema([(COLUMN_LABELS[col], pa.string()) for col in columns])
+    with pq.ParquetWriter(sink, schema) as writer:
+        for chunk in iter_display_chunks(articles, rows, columns, chunk_size):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+def export_to_file(export_format, articles, rows, columns):
+    """Run the chunked writer for export_format into a temporary file, rewound for reading"""
+    extension, _ = EXPORT_FORMATS[export_format]
+    sink = tempfile.TemporaryFile()
+
+    if extension == 'csv':
+        for block in iter_csv(articles, rows, columns):
+            sink.write(block)
+    elif extension == 'xlsx':
+        write_xlsx(articles, rows, columns, sink)
+    else:
+        write_parquet(articles, rows, columns, sink)
+
+    sink.seek(0)
+    return sink
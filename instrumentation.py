@@ -0,0 +1,213 @@
+import collections
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# ═════════════════════════════════════════════════════════════════
+# TIMING SPANS
+# ═════════════════════════════════════════════════════════════════
+# Off unless KEC_INSTRUMENTATION is set (or switched on from the admin panel);
+# when off, span() hands back one shared no-op context manager.
+_enabled = os.environ.get('KEC_INSTRUMENTATION', '').lower() in ('1', 'true', 'yes')
+
+RING_SIZE = 200
+STAGES = ['ingest', 'filtering', 'aggregation', 'rendering']
+
+_local = threading.local()
+_lock = threading.Lock()
+_reruns = collections.deque(maxlen=RING_SIZE)
+_span_totals = {}
+_rerun_totals = [0, 0.0]
+_NULL_SPAN = nullcontext()
+
+def is_enabled():
+    return _enabled
+
+def set_enabled(value):
+    """Switch span collection on or off for the whole process"""
+    global _enabled
+    _enabled = bool(value)
+
+def begin_rerun(session_id):
+    """Start collecting spans for the script run on this thread"""
+    _local.rerun = None
+    _local.stack = []
+    if _enabled:
+        _local.rerun = {'session': session_id, 'started_at': time.time(),
+                        'started': time.perf_counter(), 'spans': []}
+
+def end_rerun():
+    """Finish the current run and push it into the ring buffer"""
+    rerun = getattr(_local, 'rerun', None)
+    _local.rerun = None
+    if rerun is None:
+        return
+    rerun['seconds'] = time.perf_counter() - rerun.pop('started')
+    with _lock:
+        _reruns.append(rerun)
+        _rerun_totals[0] += 1
+        _rerun_totals[1] += rerun['seconds']
+
+def span(stage, name):
+    """Time a block of work as `name` within one of STAGES"""
+    if not _enabled:
+        return _NULL_SPAN
+    return _timed(stage, name)
+
+@contextmanager
+def _timed(stage, name):
+    # Spans nest (ingest wraps parsing, merging and the stats build), so every open
+    # span on this thread keeps a running total of the time spent in its children
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(0.0)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        nested = stack.pop()
+        if stack:
+            stack[-1] += seconds
+        rerun = getattr(_local, 'rerun', None)
+        if rerun is not None:
+            rerun['spans'].append((stage, name, seconds, seconds - nested))
+        with _lock:
+            totals = _span_totals.setdefault((stage, name), [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+
+def recent_reruns():
+    """Snapshot of the ring buffer, oldest first"""
+    with _lock:
+        return list(_reruns)
+
+def span_totals():
+    """Snapshot of {(stage, name): (calls, seconds)} since the process started; seconds include nested spans"""
+    with _lock:
+        return {key: tuple(value) for key, value in _span_totals.items()}
+
+def stage_breakdown(rerun):
+    """Seconds per stage for one recorded run, counting each span's own time only.
+
+    A nested span's time goes to its own stage and not again to the span
+    around it, so the stages never add up to more than the run took.
+    """
+    breakdown = dict.fromkeys(STAGES, 0.0)
+    for stage, _, _, own_seconds in rerun['spans']:
+        breakdown[stage] = breakdown.get(stage, 0.0) + own_seconds
+    return breakdown
+
+# ═════════════════════════════════════════════════════════════════
+# PROMETHEUS EXPORT
+# ═════════════════════════════════════════════════════════════════
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def prometheus_metrics():
+    """Render span and rerun totals in the Prometheus text exposition format"""
+    totals = span_totals()
+    with _lock:
+        reruns, rerun_seconds = _rerun_totals
+
+    lines = ['# HELP kec_span_seconds_total Time spent in instrumented dashboard spans.',
+             '# TYPE kec_span_seconds_total counter']
+    for (stage, name), (_, seconds) in sorted(totals.items()):
+        lines.append(f'kec_span_seconds_total{{stage="{_label(stage)}",span="{_label(name)}"}} {seconds:.6f}')
+
+    lines += ['# HELP kec_span_calls_total Number of times each span ran.',
+              '# TYPE kec_span_calls_total counter']
+    for (stage, name), (calls, _) in sorted(totals.items()):
+        lines.append(f'kec_span_calls_total{{stage="{_label(stage)}",span="{_label(name)}"}} {calls}')
+
+    lines += ['# HELP kec_reruns_total Instrumented dashboard script runs.',
+              '# TYPE kec_reruns_total counter',
+              f'kec_reruns_total {reruns}',
+              '# HELP kec_rerun_seconds_total Wall time of instrumented dashboard script runs.',
+              '# TYPE kec_rerun_seconds_total counter',
+              f'kec_rerun_seconds_total {rerun_seconds:.6f}',
+              '# HELP kec_instrumentation_enabled Whether span collection is on.',
+              '# TYPE kec_instrumentation_enabled gauge',
+              f'kec_instrumentation_enabled {int(_enabled)}']
+    return '\n'.join(lines) + '\n'
+
+# ═════════════════════════════════════════════════════════════════
+# SAMPLING PROFILER
+# ═════════════════════════════════════════════════════════════════
+class SamplingProfiler:
+    """Samples the stack of one session's script thread from a background thread.
+
+    Streamlit may run each rerun on a different thread, so attach() is called
+    at the start of every run to retarget the sampler. `alive`, if given, is
+    polled about once a second; the sampler stops itself once it returns False,
+    since a session that closes mid-profile never gets to call stop().
+    """
+
+    def __init__(self, interval=0.005, max_depth=40, alive=None):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.alive = alive
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._target = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def attach(self, thread_id):
+        self._target = thread_id
+
+    def detach(self):
+        """Pause sampling between reruns so idle time is not recorded"""
+        self._target = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='kec-sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    def _run(self):
+        own_file = __file__
+        checked = time.monotonic()
+        while not self._stop.wait(self.interval):
+            if self.alive is not None and time.monotonic() - checked > 1:
+                checked = time.monotonic()
+                if not self.alive():
+                    self._stop.set()
+                    return
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                if code.co_filename != own_file:
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+    def top_functions(self, limit=25):
+        """[(file:function, self samples, total samples)] ordered by self samples"""
+        own = collections.Counter()
+        total = collections.Counter()
+        for stack, count in list(self.stacks.items()):
+            # Stack entries are file:function:line; rank whole functions, not single lines
+            functions = [entry.rsplit(':', 1)[0] for entry in stack]
+            own[functions[-1]] += count
+            for function in set(functions):
+                total[function] += count
+        return [(function, count, total[function]) for function, count in own.most_common(limit)]
+
+    def collapsed(self):
+        """Stacks in the collapsed format read by flamegraph tools"""
+        return '\n'.join(f"{';'.join(stack)} {count}" for stack, count in list(self.stacks.items()))
@@ -0,0 +1,316 @@
+"""Read-only HTTP API over the dashboard's article store.
+
+Run standalone with ``python query_api.py --port 8502``, or set the
+``KEC_API_PORT`` environment variable so the Streamlit app starts it in a
+background thread sharing the dashboard's already loaded store. Either way
+every request first checks the workbooks' modification times, so edits are
+picked up (and ETags change) without a restart.
+
+Endpoints (all GET):
+    /health                         dataset version and article count
+    /articles                       Industry Updates filter with pagination
+    /search?q=...                   text search, accepts the same filters
+    /articles/export?type=csv       full filtered result as csv, xlsx or parquet
+    /stats/competitors[/<name>]     per-competitor summary statistics
+    /stats/sbus[/<name>]            per-SBU summary statistics
+    /metrics                        instrumentation spans in Prometheus format
+
+Add ``format=arrow`` (or ``Accept: application/vnd.apache.arrow.stream``) for
+an Arrow IPC stream instead of JSON.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import threading
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pandas as pd
+import pyarrow as pa
+
+import instrumentation
+from aliases import get_resolver
+from data_store import SOURCE_COLUMNS, filter_articles, find_workbooks, get_store, search_articles
+from exports import ARTICLE_TABLE, EXPORT_FORMATS, export_to_file, iter_csv
+
+ARROW_MIME = 'application/vnd.apache.arrow.stream'
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+STATS_TABLES = {'competitors': 'competitor', 'sbus': 'sbu'}
+
+logger = logging.getLogger(__name__)
+
+class ApiError(Exception):
+    """An error that maps directly onto an HTTP status code"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# ═════════════════════════════════════════════════════════════════
+# QUERIES
+# ═════════════════════════════════════════════════════════════════
+def _param(params, name, default=None):
+    values = params.get(name)
+    return values[0] if values and values[0] != '' else default
+
+def _int_param(params, name, default, minimum, maximum):
+    value = _param(params, name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be an integer")
+    return max(minimum, min(value, maximum))
+
+def _entity_param(dataset, params, name, kind):
+    """Read a competitor/SBU name, accepting any alias of the canonical entity"""
+    value = _param(params, name)
+    if value is None:
+        return None
+    # Names the alias file does not cover can still match the dataset's own canonical names
+    return get_resolver().lookup(value, kind, dataset.stats[STATS_TABLES[kind]].index)
+
+def _date_param(params, name):
+    value = _param(params, name)
+    if value is None:
+        return None
+    try:
+        return pd.Timestamp(value).date()
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be a date (YYYY-MM-DD)")
+
+def select_articles(dataset, params):
+    """Apply the article filters and optional text search from the query string"""
+    articles = filter_articles(dataset.articles, dataset.codes,
+                               competitor=_entity_param(dataset, params, 'competitor', 'competitors'),
+                               category=_param(params, 'category'),
+                               sbu=_entity_param(dataset, params, 'sbu', 'sbus'),
+                               start=_date_param(params, 'start'),
+                               end=_date_param(params, 'end'))
+
+    query = _param(params, 'q')
+    if query is not None:
+        articles = search_articles(articles, query)
+    return articles
+
+def query_articles(dataset, params):
+    """Filter, optionally search, and paginate articles; returns (page_df, meta)"""
+    articles = select_articles(dataset, params)
+
+    page = _int_param(params, 'page', 1, 1, 10 ** 9)
+    page_size = _int_param(params, 'page_size', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    offset = (page - 1) * page_size
+
+    meta = {'version': dataset.version, 'total': len(articles), 'page': page, 'page_size': page_size}
+    # The full source title and text only feed the summarizer; they are not part of the API rows
+    return articles.iloc[offset:offset + page_size].drop(columns=SOURCE_COLUMNS), meta
+
+def export_request(dataset, params):
+    """Validate an export request; returns (articles, file extension, export format, mime type)"""
+    export_type = _param(params, 'type', 'csv')
+    formats = {extension: (name, mime) for name, (extension, mime) in EXPORT_FORMATS.items()}
+    if export_type not in formats:
+        raise ApiError(400, f"'type' must be one of: {', '.join(formats)}")
+    export_format, mime = formats[export_type]
+    return select_articles(dataset, params), export_type, export_format, mime
+
+def query_stats(dataset, table, name, params):
+    """Return a stats table (or one row of it) sorted on the requested metric"""
+    stats = dataset.stats[STATS_TABLES[table]]
+
+    if name is not None:
+        name = get_resolver().lookup(name, table, stats.index)
+        if name not in stats.index:
+            raise ApiError(404, f"Unknown entry '{name}'")
+        stats = stats.loc[[name]]
+
+    sort = _param(params, 'sort', 'articles')
+    if sort not in stats.columns:
+        raise ApiError(400, f"'sort' must be one of: {', '.join(stats.columns)}")
+    stats = stats.sort_values(sort, ascending=_param(params, 'order') == 'asc')
+
+    return stats.reset_index(names='name'), {'version': dataset.version, 'total': len(stats)}
+
+# ═════════════════════════════════════════════════════════════════
+# SERIALIZATION
+# ═════════════════════════════════════════════════════════════════
+def to_json(df, meta):
+    records = json.loads(df.to_json(orient='records', date_format='iso'))
+    return json.dumps({**meta, 'rows': records}).encode('utf-8')
+
+def to_arrow(df, meta):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           b'kec_meta': json.dumps(meta).encode('utf-8')})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def etag_matches(etag, if_none_match):
+    """True if an If-None-Match header lists this exact entity tag (or is '*')"""
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+# ═════════════════════════════════════════════════════════════════
+# HTTP HANDLER
+# ═════════════════════════════════════════════════════════════════
+class QueryHandler(BaseHTTPRequestHandler):
+    server_version = 'KECQueryAPI/1.0'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        parts = [unquote(p) for p in url.path.strip('/').split('/') if p]
+
+        if parts == ['metrics']:
+            body = instrumentation.prometheus_metrics().encode('utf-8')
+            return self._send(200, body, 'text/plain; version=0.0.4')
+
+        dataset = self._dataset()
+        if dataset is None:
+            return self._send_error(503, 'No dataset loaded')
+
+        wants_arrow = _param(params, 'format') == 'arrow' or ARROW_MIME in self.headers.get('Accept', '')
+        # Every response is a pure function of the URL and the dataset version
+        etag = f'"{dataset.version}-{"arrow" if wants_arrow else "json"}"'
+
+        # Route and validate first: only a request that would succeed can be a 304
+        try:
+            if parts == ['health']:
+                body = json.dumps({'version': dataset.version, 'articles': len(dataset.articles)}).encode('utf-8')
+                respond = partial(self._send, 200, body, 'application/json', etag)
+            elif parts == ['articles', 'export']:
+                respond = partial(self._send_export, dataset, *export_request(dataset, params), etag)
+            elif parts in (['articles'], ['search']):
+                if parts == ['search'] and _param(params, 'q') is None:
+                    raise ApiError(400, "'q' is required")
+                respond = partial(self._send_table, *query_articles(dataset, params), wants_arrow, etag)
+            elif len(parts) in (2, 3) and parts[0] == 'stats' and parts[1] in STATS_TABLES:
+                df, meta = query_stats(dataset, parts[1], parts[2] if len(parts) == 3 else None, params)
+                respond = partial(self._send_table, df, meta, wants_arrow, etag)
+            else:
+                raise ApiError(404, f"Unknown endpoint '{url.path}'")
+        except ApiError as e:
+            return self._send_error(e.status, str(e))
+
+        if etag_matches(etag, self.headers.get('If-None-Match', '')):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Vary', 'Accept')
+            self.end_headers()
+            return
+        respond()
+
+    def _dataset(self):
+        """The store's dataset, re-read first if the server's workbooks changed on disk"""
+        source = self.server.data_source
+        if source is not None and find_workbooks(source):
+            try:
+                # Only a signature check unless a file changed
+                dataset, fresh = get_store().load(source)
+                if fresh and self.server.on_reload is not None:
+                    self.server.on_reload(dataset)
+                return dataset
+            except Exception:
+                logger.exception("Could not reload %s; serving the dataset already loaded", source)
+        return get_store().current()
+
+    def _send_table(self, df, meta, wants_arrow, etag):
+        if wants_arrow:
+            self._send(200, to_arrow(df, meta), ARROW_MIME, etag)
+        else:
+            self._send(200, to_json(df, meta), 'application/json', etag)
+
+    def _send_export(self, dataset, articles, export_type, export_format, mime, etag):
+        """Send the filtered articles without building the whole file in memory.
+
+        CSV goes out chunk by chunk as it is formatted. XLSX and Parquet are
+        written to a temporary file before the status line, so a writer error
+        becomes a 500 instead of a truncated 200.
+        """
+        if export_type == 'csv':
+            self._send_export_headers(export_type, mime, etag)
+            # HTTP/1.0 responses end at connection close, so chunks can go straight out
+            for block in iter_csv(dataset.articles, articles.index, ARTICLE_TABLE):
+                self.wfile.write(block)
+            return
+
+        try:
+            export_file = export_to_file(export_format, dataset.articles, articles.index, ARTICLE_TABLE)
+        except Exception:
+            logger.exception("Building the %s export failed", export_type)
+            return self._send_error(500, f"Could not build the {export_type} export")
+        with export_file:
+            self._send_export_headers(export_type, mime, etag, os.fstat(export_file.fileno()).st_size)
+            shutil.copyfileobj(export_file, self.wfile)
+
+    def _send_export_headers(self, export_type, mime, etag, length=None):
+        self.send_response(200)
+        self.send_header('Content-Type', mime)
+        self.send_header('Content-Disposition', f'attachment; filename="articles.{export_type}"')
+        if length is not None:
+            self.send_header('Content-Length', str(length))
+        self.send_header('ETag', etag)
+        self.send_header('Vary', 'Accept')
+        self.end_headers()
+
+    def _send(self, status, body, content_type, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+            # The ETag and body depend on Accept when no format parameter is given
+            self.send_header('Vary', 'Accept')
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        self._send(status, json.dumps({'error': message}).encode('utf-8'), 'application/json')
+
+    def log_message(self, format, *args):
+        pass
+
+# ═════════════════════════════════════════════════════════════════
+# SERVER
+# ═════════════════════════════════════════════════════════════════
+def make_server(port, host='127.0.0.1', source=None, on_reload=None):
+    """Build the API server; with a source, requests reload those workbooks when they change.
+
+    on_reload(dataset) is called after a request triggered a fresh ingest.
+    """
+    server = ThreadingHTTPServer((host, port), QueryHandler)
+    server.data_source = source
+    server.on_reload = on_reload
+    return server
+
+def start_in_background(port, host='127.0.0.1', source=None, on_reload=None):
+    """Serve the API from a daemon thread, sharing this process's store"""
+    server = make_server(port, host, source, on_reload)
+    threading.Thread(target=server.serve_forever, name='kec-query-api', daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Read-only query API for the competitor dashboard')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--data', default='competitor_data.xlsx',
+                        help='Excel file, directory of workbooks or glob pattern to serve')
+    args = parser.parse_args()
+
+    dataset, _ = get_store().load(args.data)
+    for path, sheet_name, rows, seconds in dataset.ingest_report:
+        print(f"Loaded {rows} articles from {path} [{sheet_name}] in {seconds:.2f}s")
+    print(f"Serving {len(dataset.articles)} articles on http://{args.host}:{args.port}")
+    make_server(args.port, args.host, args.data).serve_forever()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.environ.get('KEC_SUMMARY_CACHE',
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'summary_cache.sqlite3'))
+DEFAULT_BACKEND = os.environ.get('KEC_SUMMARY_BACKEND', 'extractive')
+BATCH_SIZE = int(os.environ.get('KEC_SUMMARY_BATCH_SIZE', '16'))
+MAX_CONCURRENCY = int(os.environ.get('KEC_SUMMARY_CONCURRENCY', '2'))
+# KEC_SUMMARIES=0 switches background summarization off; cards then show the ingest text
+ENABLED = os.environ.get('KEC_SUMMARIES', '1').lower() not in ('0', 'false', 'no')
+
+# Ingest fills in these when a row has no article text; there is nothing to summarize
+PLACEHOLDER_TEXTS = {'', 'nan', 'No summary available'}
+
+SUMMARY_PROMPT = ("Summarize this news article for a competitor intelligence dashboard in at most two "
+                  "sentences. Reply with the summary only.\n\nTitle: {title}\n\n{text}")
+
+# ═════════════════════════════════════════════════════════════════
+# BACKENDS
+# ═════════════════════════════════════════════════════════════════
+# A backend turns a list of (title, text) pairs into a list of summaries.
+# `name` is stored next to every cached summary.
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+_WORD = re.compile(r'[a-z][a-z0-9&-]+')
+_STOPWORDS = set('''a an and are as at be by for from has have in is it its of on or that the this to was
+were will with after over under into their our about than also more said says new'''.split())
+
+class ExtractiveBackend:
+    """Picks the highest-scoring sentences by word frequency; pure Python, runs anywhere.
+
+    Being pure Python it holds the GIL while it works, so inside the Streamlit
+    server it competes with script reruns. It yields after every article; on
+    large datasets also consider KEC_SUMMARY_CONCURRENCY=1 (extra threads add
+    no throughput here) or a remote backend.
+    """
+
+    name = 'extractive'
+
+    def __init__(self, max_sentences=2, max_chars=320):
+        self.max_sentences = max_sentences
+        self.max_chars = max_chars
+
+    def summarize(self, items):
+        summaries = []
+        for title, text in items:
+            summaries.append(self._summarize(title, text))
+            # Let waiting script threads have the GIL between articles
+            time.sleep(0)
+        return summaries
+
+    def _summarize(self, title, text):
+        sentences = [s.strip() for s in _SENTENCE_SPLIT.split(text) if s.strip()]
+        if len(sentences) <= self.max_sentences:
+            return text.strip()[:self.max_chars] or title
+
+        # Words from the title count double: they say what the article is about
+        frequencies = Counter(w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS)
+        frequencies.update(w for w in _WORD.findall(title.lower()) if w not in _STOPWORDS)
+
+        def score(sentence):
+            words = [w for w in _WORD.findall(sentence.lower()) if w not in _STOPWORDS]
+            return sum(frequencies[w] for w in words) / (len(words) or 1)
+
+        best = sorted(range(len(sentences)), key=lambda i: score(sentences[i]), reverse=True)
+        chosen = sorted(best[:self.max_sentences])
+        return ' '.join(sentences[i] for i in chosen)[:self.max_chars]
+
+class TransformersBackend:
+    """Abstractive summaries from a local Hugging Face model on CPU"""
+
+    name = 'transformers'
+
+    def __init__(self, model=None):
+        from transformers import pipeline
+        self._pipeline = pipeline('summarization',
+                                  model=model or os.environ.get('KEC_SUMMARY_MODEL', 'sshleifer/distilbart-cnn-12-6'),
+                                  device=-1)
+
+    def summarize(self, items):
+        texts = [f"{title}. {text}" for title, text in items]
+        outputs = self._pipeline(texts, max_length=80, min_length=20, truncation=True, batch_size=len(texts))
+        return [output['summary_text'].strip() for output in outputs]
+
+class AnthropicBackend:
+    """Remote summaries through the Anthropic API (needs ANTHROPIC_API_KEY)"""
+
+    name = 'anthropic'
+
+    def __init__(self, model=None):
+        import anthropic
+        self._client = anthropic.Anthropic()
+        self._model = model or os.environ.get('KEC_ANTHROPIC_MODEL', 'claude-3-5-haiku-latest')
+
+    def summarize(self, items):
+        summaries = []
+        for title, text in items:
+            response = self._client.messages.create(
+                model=self._model, max_tokens=200,
+                messages=[{'role': 'user', 'content': SUMMARY_PROMPT.format(title=title, text=text)}])
+            summaries.append(''.join(block.text for block in response.content if block.type == 'text').strip())
+        return summaries
+
+class OpenAIBackend:
+    """Remote summaries through the OpenAI API (needs OPENAI_API_KEY)"""
+
+    name = 'openai'
+
+    def __init__(self, model=None):
+        import openai
+        self._client = openai.OpenAI()
+        self._model = model or os.environ.get('KEC_OPENAI_MODEL', 'gpt-4o-mini')
+
+    def summarize(self, items):
+        summaries = []
+        for title, text in items:
+            response = self._client.chat.completions.create(
+                model=self._model, max_tokens=200,
+                messages=[{'role': 'user', 'content': SUMMARY_PROMPT.format(title=title, text=text)}])
+            summaries.append((response.choices[0].message.content or '').strip())
+        return summaries
+
+class StubBackend:
+    """Deterministic stand-in for tests and offline runs"""
+
+    name = 'stub'
+
+    def summarize(self, items):
+        return [f"{title[:60]}: {text[:100]}" for title, text in items]
+
+BACKENDS = {
+    'extractive': ExtractiveBackend,
+    'transformers': TransformersBackend,
+    'anthropic': AnthropicBackend,
+    'openai': OpenAIBackend,
+    'stub': StubBackend
+}
+
+def get_backend(name=DEFAULT_BACKEND):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown summary backend '{name}' (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
+
+# ═════════════════════════════════════════════════════════════════
+# PERSISTENT CACHE
+# ═════════════════════════════════════════════════════════════════
+class SummaryCache:
+    """SQLite table of summaries keyed by (content hash, backend)"""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS summaries (
+                                content_hash TEXT NOT NULL,
+                                backend TEXT NOT NULL,
+                                summary TEXT NOT NULL,
+                                created_at REAL NOT NULL,
+                                PRIMARY KEY (content_hash, backend))''')
+
+    def _connect(self):
+        # One short-lived connection per call keeps this safe across threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_many(self, hashes, backend):
+        """{content_hash: summary} for the hashes that are cached"""
+        found = {}
+        hashes = list(hashes)
+        with closing(self._connect()) as conn:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT content_hash, summary FROM summaries WHERE backend = ? "
+                    f"AND content_hash IN ({','.join('?' * len(chunk))})", [backend] + chunk)
+                found.update(rows)
+        return found
+
+    def put_many(self, summaries, backend):
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany('INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?)',
+                             [(h, backend, summary, now) for h, summary in summaries.items()])
+
+# ═════════════════════════════════════════════════════════════════
+# PIPELINE
+# ═════════════════════════════════════════════════════════════════
+class SummaryPipeline:
+    """Summarizes articles in the background, in batches, at most once per content hash.
+
+    submit() returns immediately; lookup() only reads what is already cached,
+    so callers never wait on a backend. The backend itself is built on the
+    first background batch, since that can mean loading a model or a client
+    library.
+    """
+
+    def __init__(self, backend=None, cache=None, batch_size=BATCH_SIZE, max_concurrency=MAX_CONCURRENCY,
+                 backend_name=DEFAULT_BACKEND):
+        self.backend_name = backend.name if backend is not None else backend_name
+        self.cache = cache or SummaryCache()
+        self.batch_size = batch_size
+        self._backend = backend
+        self._backend_failed = False
+        self._backend_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='kec-summarize')
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    def _get_backend(self):
+        """Build the backend on first use; None (logged once) if it cannot start"""
+        with self._backend_lock:
+            if self._backend is None and not self._backend_failed:
+                try:
+                    self._backend = get_backend(self.backend_name)
+                except Exception:
+                    self._backend_failed = True
+                    logger.exception("Could not start the '%s' summary backend; no summaries will be generated",
+                                     self.backend_name)
+            return self._backend
+
+    def submit(self, articles):
+        """Queue every article in the table that has text but no cached summary yet"""
+        # The untruncated title and text, exactly what content_hash was computed from
+        items = list(zip(articles['content_hash'], articles['source_title'], articles['source_text']))
+        threading.Thread(target=self._enqueue, args=(items,), name='kec-summarize-enqueue', daemon=True).start()
+
+    def _enqueue(self, items):
+        if self._get_backend() is None:
+            return
+        try:
+            unique = {h: (title, text) for h, title, text in items if text.strip() not in PLACEHOLDER_TEXTS}
+            cached = self.cache.get_many(unique, self.backend_name)
+            with self._lock:
+                missing = [h for h in unique if h not in cached and h not in self._in_flight]
+                self._in_flight.update(missing)
+            for start in range(0, len(missing), self.batch_size):
+                batch = {h: unique[h] for h in missing[start:start + self.batch_size]}
+                self._executor.submit(self._run_batch, batch)
+        except Exception:
+            logger.exception("Could not queue articles for summarization")
+
+    def _run_batch(self, batch):
+        try:
+            summaries = self._get_backend().summarize(list(batch.values()))
+            self.cache.put_many(dict(zip(batch, summaries)), self.backend_name)
+        except Exception:
+            logger.exception("Summarizing a batch of %d articles failed", len(batch))
+        finally:
+            with self._lock:
+                self._in_flight.difference_update(batch)
+
+    def lookup(self, hashes):
+        """Cached summaries for the given content hashes (missing ones are simply absent)"""
+        return self.cache.get_many(hashes, self.backend_name)
+
+    def pending(self):
+        with self._lock:
+            return len(self._in_flight)
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+def get_pipeline():
+    """Return the process-wide pipeline for the configured backend, or None if summaries are off"""
+    global _pipeline
+    if not ENABLED:
+        return None
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = SummaryPipeline()
+    return _pipeline
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# Tests import the dashboard modules straight from the repo root
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from data_store import prepare_articles  # noqa: E402
+
+RAW_ARTICLES = [
+    # newstitle, summary, Competitor, SBU, publishedate, category
+    ('Metro order', 'Wins a metro order. Worth 500 crore.', 'ABB', 'Civil', '2024-01-04 09:00', 'Order Wins'),
+    ('Grid deal', 'Signs a grid deal.', 'ABB, Siemens', 'India T&D', '2024-01-01 10:00', 'Alliance/Partnership'),
+    ('Q3 results', 'Revenue grows.', 'Siemens', 'Global', '2024-01-03 15:30', 'Financial'),
+    ('Solar plant', 'Builds a solar plant.', 'Tata Projects', 'Renewables, Civil', '2024-01-02 08:00', 'Order Wins'),
+    ('No competitor', 'General industry news.', None, None, '2024-01-06 12:00', 'Industry'),
+    ('Rail line', 'Electrifies a rail line.', 'Siemens, Tata Projects', 'Transportation', '2024-01-05 23:59', 'Order Wins')
+]
+
+@pytest.fixture
+def raw_articles():
+    """Six workbook rows over six days, deliberately out of date order"""
+    return pd.DataFrame(RAW_ARTICLES, columns=['newstitle', 'summary', 'Competitor', 'SBU', 'publishedate', 'category'])
+
+@pytest.fixture
+def articles(raw_articles):
+    """The raw rows normalized the way ingest does it"""
+    return prepare_articles(raw_articles)
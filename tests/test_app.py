@@ -0,0 +1,32 @@
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import summarizer
+from exports import EXPORT_FORMATS
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Competitor Intel App.py')
+
+@pytest.fixture
+def app(tmp_path, raw_articles, monkeypatch):
+    """The dashboard running on the fixture articles, with background summaries off"""
+    path = str(tmp_path / 'articles.xlsx')
+    raw_articles.to_excel(path, index=False)
+    monkeypatch.setenv('KEC_DATA_SOURCE', path)
+    monkeypatch.setattr(summarizer, 'ENABLED', False)
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.run()
+    assert not at.exception
+    return at
+
+@pytest.mark.parametrize('export_format', list(EXPORT_FORMATS))
+def test_prepare_export_offers_the_download(app, export_format):
+    app.selectbox(key='ind_export_format').set_value(export_format).run()
+    app.button(key='ind_export').click().run()
+    assert not app.exception
+
+    downloads = app.get('download_button')
+    assert len(downloads) == 1
+    extension, _ = EXPORT_FORMATS[export_format]
+    assert downloads[0].proto.label.endswith(f'.{extension}')
@@ -0,0 +1,65 @@
+from datetime import date
+
+import pandas as pd
+
+from data_store import (build_entity_codes, date_range_rows, entity_articles, filter_articles, latest_articles,
+                        prepare_articles)
+
+def titles(df):
+    return list(df['newstitle'])
+
+def test_ingest_presorts_by_publish_date(articles):
+    assert articles['publishedate'].is_monotonic_increasing
+    assert list(articles.index) == list(range(len(articles)))
+
+def test_open_range_returns_every_article(articles):
+    assert len(date_range_rows(articles)) == len(articles)
+
+def test_bounds_are_inclusive_whole_days(articles):
+    # 2024-01-03 15:30 must count as inside a range ending on 2024-01-03
+    assert titles(date_range_rows(articles, date(2024, 1, 2), date(2024, 1, 3))) == ['Solar plant', 'Q3 results']
+    assert titles(date_range_rows(articles, date(2024, 1, 5), date(2024, 1, 5))) == ['Rail line']
+
+def test_one_sided_ranges(articles):
+    assert titles(date_range_rows(articles, start=date(2024, 1, 5))) == ['Rail line', 'No competitor']
+    assert titles(date_range_rows(articles, end=date(2024, 1, 1))) == ['Grid deal']
+
+def test_ranges_outside_the_data_are_empty(articles):
+    assert date_range_rows(articles, date(2023, 1, 1), date(2023, 12, 31)).empty
+    assert date_range_rows(articles, date(2024, 2, 1), None).empty
+    assert date_range_rows(articles, date(2024, 1, 4), date(2024, 1, 3)).empty
+
+def test_filter_articles_applies_range_newest_first(articles):
+    codes = build_entity_codes(articles)
+    result = filter_articles(articles, codes, start=date(2024, 1, 2), end=date(2024, 1, 5))
+    assert titles(result) == ['Rail line', 'Metro order', 'Q3 results', 'Solar plant']
+
+def test_latest_articles_filter_the_newest_few(articles):
+    codes = build_entity_codes(articles)
+    # The filters narrow the newest three, they do not reach further back
+    assert titles(latest_articles(articles, codes, limit=3)) == ['No competitor', 'Rail line', 'Metro order']
+    assert titles(latest_articles(articles, codes, competitor='Siemens', limit=3)) == ['Rail line']
+    assert titles(latest_articles(articles, codes, category='Order Wins', end=date(2024, 1, 4), limit=3)) == [
+        'Metro order', 'Solar plant']
+
+def test_entity_articles_in_range_newest_first(articles):
+    codes = build_entity_codes(articles)
+    assert titles(entity_articles(articles, codes, 'competitor_list', 'Siemens')) == [
+        'Rail line', 'Q3 results', 'Grid deal']
+    assert titles(entity_articles(articles, codes, 'sbu_list', 'Civil', start=date(2024, 1, 3))) == ['Metro order']
+    assert entity_articles(articles, codes, 'sbu_list', 'Nowhere').empty
+
+def test_excel_serial_dates_are_days_since_the_excel_epoch(raw_articles):
+    # competitor_data.xlsx stores publishedate as serial day numbers, not datetimes
+    serials = raw_articles.assign(publishedate=[45295.375, 45292.416666666664, 45294.645833333336,
+                                                45293.333333333336, 45297.5, 45296.99930555555])
+    expected = prepare_articles(raw_articles)['publishedate']
+    result = prepare_articles(serials)['publishedate']
+    pd.testing.assert_series_equal(result, expected)
+    assert titles(date_range_rows(prepare_articles(serials), date(2024, 1, 5), date(2024, 1, 5))) == ['Rail line']
+
+def test_serial_and_text_dates_can_share_a_sheet(raw_articles):
+    mixed = raw_articles.assign(publishedate=[45295.375] + list(raw_articles['publishedate'][1:]))
+    articles = prepare_articles(mixed)
+    assert articles['publishedate'].is_monotonic_increasing
+    assert articles.loc[articles['newstitle'] == 'Metro order', 'publishedate'].iloc[0] == pd.Timestamp('2024-01-04 09:00')
@@ -0,0 +1,93 @@
+import json
+import os
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from aliases import AliasResolver, normalize_name
+from data_store import EntityCodes, build_entity_codes
+
+# ═════════════════════════════════════════════════════════════════
+# ENTITY CODES
+# ═════════════════════════════════════════════════════════════════
+def test_mask_marks_every_article_mentioning_the_name():
+    codes = EntityCodes([['ABB', 'Siemens'], [], ['Siemens'], ['ABB']])
+    assert codes.names == ['ABB', 'Siemens']
+    np.testing.assert_array_equal(codes.mask('ABB'), [True, False, False, True])
+    np.testing.assert_array_equal(codes.mask('Siemens'), [True, False, True, False])
+
+def test_mask_for_an_unknown_name_is_all_false():
+    codes = EntityCodes([['ABB'], []])
+    assert not codes.mask('Nobody').any()
+    assert len(codes.mask('Nobody')) == 2
+
+def test_mask_matches_list_membership(articles):
+    codes = build_entity_codes(articles)
+    for name in ['ABB', 'Siemens', 'Tata Projects']:
+        expected = articles['competitor_list'].apply(lambda names: name in names).values
+        np.testing.assert_array_equal(codes['competitor_list'].mask(name), expected)
+
+# ═════════════════════════════════════════════════════════════════
+# ALIAS RESOLVER
+# ═════════════════════════════════════════════════════════════════
+@pytest.fixture
+def alias_file(tmp_path):
+    path = tmp_path / 'aliases.json'
+    path.write_text(json.dumps({
+        'competitors': {'Larsen & Toubro Limited': ['L&T', 'Larsen and Toubro']},
+        'sbus': {'India T&D': ['Domestic T&D']}
+    }))
+    return str(path)
+
+@pytest.fixture
+def resolver(alias_file):
+    return AliasResolver(alias_file)
+
+def test_normalize_name_drops_case_punctuation_and_legal_suffixes():
+    assert normalize_name('Tata Power Co. Ltd.') == 'tata power'
+    assert normalize_name('L&T') == 'l and t'
+    assert normalize_name('Ltd') == 'ltd'
+
+def test_alias_file_variants_resolve_to_their_canonical_name(resolver):
+    resolved = resolver.resolve_many(Counter(['L&T', 'larsen AND toubro ltd', 'Larsen & Tuobro']), 'competitors')
+    assert set(resolved.values()) == {'Larsen & Toubro Limited'}
+    assert resolver.resolve_many(Counter(['Domestic T&D']), 'sbus') == {'Domestic T&D': 'India T&D'}
+
+def test_unknown_names_group_under_the_most_frequent_spelling(resolver):
+    counts = Counter({'Tata Power': 1, 'Tata Power Co Ltd': 3, 'Acme Infra': 2})
+    assert resolver.resolve_many(counts, 'competitors') == {
+        'Tata Power': 'Tata Power Co Ltd', 'Tata Power Co Ltd': 'Tata Power Co Ltd', 'Acme Infra': 'Acme Infra'}
+
+def test_canonical_names_do_not_depend_on_order_or_history(alias_file):
+    names = ['Tata Power Co Ltd', 'Tata Power']
+    forward = AliasResolver(alias_file).resolve_many(Counter(names), 'competitors')
+    backward = AliasResolver(alias_file).resolve_many(Counter(reversed(names)), 'competitors')
+    assert forward == backward == {'Tata Power Co Ltd': 'Tata Power', 'Tata Power': 'Tata Power'}
+
+    # An earlier ingest must not change what a later one decides
+    resolver = AliasResolver(alias_file)
+    resolver.resolve_many(Counter(['Tata Power Co Ltd']), 'competitors')
+    assert resolver.resolve_many(Counter(names), 'competitors') == forward
+
+def test_lookup_matches_aliases_and_dataset_names(resolver):
+    assert resolver.lookup('Larsen and Toubro', 'competitors') == 'Larsen & Toubro Limited'
+    assert resolver.lookup('tata power', 'competitors', ['Tata Power Co Ltd']) == 'Tata Power Co Ltd'
+    assert resolver.lookup(' Nobody ', 'competitors', ['Tata Power Co Ltd']) == 'Nobody'
+
+def test_lookup_remembers_nothing(resolver):
+    tables = {kind: dict(table) for kind, table in resolver._tables.items()}
+    for i in range(50):
+        resolver.lookup(f'random query {i}', 'competitors')
+    assert resolver._tables == tables
+    assert resolver._memo == {'competitors': {}, 'sbus': {}}
+
+def test_refresh_picks_up_alias_file_edits(resolver, alias_file):
+    assert resolver.lookup('RVNL', 'competitors') == 'RVNL'
+    with open(alias_file, 'w') as f:
+        json.dump({'competitors': {'Rail Vikas Nigam Limited': ['RVNL']}}, f)
+    # Make sure the modification time moves even on coarse-grained filesystems
+    mtime = os.path.getmtime(alias_file) + 10
+    os.utime(alias_file, (mtime, mtime))
+    resolver.refresh()
+    assert resolver.lookup('RVNL', 'competitors') == 'Rail Vikas Nigam Limited'
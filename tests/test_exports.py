@@ -0,0 +1,58 @@
+import io
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from openpyxl import load_workbook
+
+from exports import (ARTICLE_TABLE, COLUMN_LABELS, EXPORT_FORMATS, export_to_file, format_display, iter_csv,
+                     write_parquet, write_xlsx)
+
+@pytest.fixture
+def rows(articles):
+    # Newest first and not contiguous, like a filtered table
+    return articles.index[::-1][:5]
+
+@pytest.fixture
+def expected(articles, rows):
+    return format_display(articles.loc[rows], ARTICLE_TABLE).reset_index(drop=True)
+
+def test_csv_chunks_match_single_pass(articles, rows, expected):
+    blocks = list(iter_csv(articles, rows, ARTICLE_TABLE, chunk_size=2))
+    # Header, then ceil(5 / 2) chunks
+    assert len(blocks) == 4
+    result = pd.read_csv(io.BytesIO(b''.join(blocks)), dtype=str, keep_default_na=False)
+    pd.testing.assert_frame_equal(result, expected.astype(str))
+
+def test_csv_with_no_rows_is_just_the_header(articles):
+    blocks = list(iter_csv(articles, articles.index[:0], ARTICLE_TABLE))
+    assert b''.join(blocks).decode('utf-8').strip() == ','.join(COLUMN_LABELS[col] for col in ARTICLE_TABLE)
+
+def test_xlsx_chunks_match_single_pass(articles, rows, expected):
+    sink = io.BytesIO()
+    write_xlsx(articles, rows, ARTICLE_TABLE, sink, chunk_size=2)
+    sheet = load_workbook(io.BytesIO(sink.getvalue()), read_only=True)['Articles']
+    values = list(sheet.iter_rows(values_only=True))
+    assert list(values[0]) == list(expected.columns)
+    assert [list(row) for row in values[1:]] == expected.values.tolist()
+
+def test_xlsx_drops_characters_worksheets_cannot_hold(articles, rows):
+    articles = articles.assign(newstitle=articles['newstitle'].str.replace(' ', '\x0b', n=1))
+    sink = io.BytesIO()
+    write_xlsx(articles, rows, ARTICLE_TABLE, sink)
+    sheet = load_workbook(io.BytesIO(sink.getvalue()), read_only=True)['Articles']
+    titles = [row[0] for row in sheet.iter_rows(min_row=2, values_only=True)]
+    assert 'Railline' in titles
+
+def test_parquet_writes_one_row_group_per_chunk(articles, rows, expected):
+    sink = io.BytesIO()
+    write_parquet(articles, rows, ARTICLE_TABLE, sink, chunk_size=2)
+    parquet = pq.ParquetFile(io.BytesIO(sink.getvalue()))
+    assert parquet.metadata.num_row_groups == 3
+    pd.testing.assert_frame_equal(parquet.read().to_pandas(), expected)
+
+@pytest.mark.parametrize('export_format', list(EXPORT_FORMATS))
+def test_export_to_file_is_rewound(articles, rows, export_format):
+    with export_to_file(export_format, articles, rows, ARTICLE_TABLE) as export_file:
+        assert export_file.tell() == 0
+        assert len(export_file.read()) > 0
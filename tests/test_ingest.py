@@ -0,0 +1,80 @@
+import os
+import sys
+import types
+
+import pandas as pd
+import pytest
+
+import data_store
+from data_store import find_workbooks, load_workbooks, prepare_articles
+
+@pytest.fixture
+def workbook_dir(tmp_path, raw_articles):
+    """Two workbooks holding the fixture rows over three sheets, plus files ingest must skip"""
+    with pd.ExcelWriter(tmp_path / 'north.xlsx') as writer:
+        raw_articles.iloc[:3].to_excel(writer, sheet_name='Orders', index=False)
+        raw_articles.iloc[3:5].to_excel(writer, sheet_name='Results', index=False)
+    raw_articles.iloc[5:].to_excel(tmp_path / 'south.xlsx', sheet_name='Sheet1', index=False)
+    # Excel's lock file for an open workbook, and an unrelated file
+    (tmp_path / '~$north.xlsx').write_bytes(b'locked')
+    (tmp_path / 'notes.txt').write_text('not a workbook')
+    return tmp_path
+
+def names(paths):
+    return [os.path.basename(path) for path in paths]
+
+# ═════════════════════════════════════════════════════════════════
+# FINDING WORKBOOKS
+# ═════════════════════════════════════════════════════════════════
+def test_directory_lists_workbooks_only(workbook_dir):
+    assert names(find_workbooks(str(workbook_dir))) == ['north.xlsx', 'south.xlsx']
+
+def test_glob_pattern(workbook_dir):
+    assert names(find_workbooks(str(workbook_dir / 's*.xlsx'))) == ['south.xlsx']
+    assert names(find_workbooks(str(workbook_dir / '*'))) == ['north.xlsx', 'south.xlsx']
+
+def test_single_file_and_missing_paths(workbook_dir):
+    assert names(find_workbooks(str(workbook_dir / 'north.xlsx'))) == ['north.xlsx']
+    assert find_workbooks(str(workbook_dir / 'missing.xlsx')) == []
+
+# ═════════════════════════════════════════════════════════════════
+# LOADING
+# ═════════════════════════════════════════════════════════════════
+def test_sheets_merge_into_one_presorted_table(workbook_dir, raw_articles):
+    articles, _ = load_workbooks(str(workbook_dir), max_workers=1)
+    expected = prepare_articles(raw_articles)
+    pd.testing.assert_frame_equal(articles, expected)
+
+def test_report_has_one_entry_per_sheet(workbook_dir):
+    _, report = load_workbooks(str(workbook_dir), max_workers=1)
+    assert [(os.path.basename(path), sheet, rows) for path, sheet, rows, _ in report] == [
+        ('north.xlsx', 'Orders', 3), ('north.xlsx', 'Results', 2), ('south.xlsx', 'Sheet1', 1)]
+    assert all(seconds >= 0 for _, _, _, seconds in report)
+
+def test_one_worker_parses_in_process(workbook_dir, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError('a single worker must not start a process pool')
+    monkeypatch.setattr(data_store, 'ProcessPoolExecutor', no_pool)
+    articles, report = load_workbooks(str(workbook_dir), max_workers=1)
+    assert len(articles) == 6
+    assert len(report) == 3
+
+def test_process_pool_gives_the_same_result(workbook_dir):
+    serial, serial_report = load_workbooks(str(workbook_dir), max_workers=1)
+    parallel, parallel_report = load_workbooks(str(workbook_dir), max_workers=2)
+    pd.testing.assert_frame_equal(parallel, serial)
+    assert [entry[:3] for entry in parallel_report] == [entry[:3] for entry in serial_report]
+
+def test_workers_do_not_rerun_the_main_script(workbook_dir, tmp_path, monkeypatch):
+    # Streamlit installs the dashboard script as __main__, and spawned workers re-import __main__
+    marker = tmp_path / 'ran'
+    script = tmp_path / 'dashboard.py'
+    script.write_text(f'open({str(marker)!r}, "w").close()\n')
+    main = types.ModuleType('__main__')
+    main.__file__ = str(script)
+    monkeypatch.setitem(sys.modules, '__main__', main)
+
+    articles, _ = load_workbooks(str(workbook_dir), max_workers=2)
+    assert len(articles) == 6
+    assert not marker.exists()
+    assert sys.modules['__main__'] is main
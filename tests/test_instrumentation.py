@@ -0,0 +1,113 @@
+import collections
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import instrumentation
+from instrumentation import SamplingProfiler, span
+
+class FakeClock:
+    """perf_counter stand-in that only moves when told to"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(instrumentation, 'time', SimpleNamespace(perf_counter=clock, time=time.time))
+    return clock
+
+@pytest.fixture
+def enabled():
+    was_enabled = instrumentation.is_enabled()
+    instrumentation.set_enabled(True)
+    yield
+    instrumentation.set_enabled(was_enabled)
+
+def record_rerun(clock):
+    """A run shaped like the dashboard's: ingest wrapping parsing and the stats build"""
+    instrumentation.begin_rerun('test')
+    with span('ingest', 'default_workbooks'):
+        clock.advance(1)
+        with span('ingest', 'parse_sheets'):
+            clock.advance(4)
+        with span('aggregation', 'summary_stats'):
+            clock.advance(2)
+    with span('filtering', 'industry_updates'):
+        clock.advance(0.5)
+        with span('rendering', 'industry_table'):
+            clock.advance(1.5)
+    instrumentation.end_rerun()
+    return instrumentation.recent_reruns()[-1]
+
+# ═════════════════════════════════════════════════════════════════
+# TIMING SPANS
+# ═════════════════════════════════════════════════════════════════
+def test_nested_spans_count_once_per_stage(clock, enabled):
+    rerun = record_rerun(clock)
+    assert rerun['seconds'] == 9
+    assert instrumentation.stage_breakdown(rerun) == {
+        'ingest': 5, 'filtering': 0.5, 'aggregation': 2, 'rendering': 1.5}
+    assert sum(instrumentation.stage_breakdown(rerun).values()) <= rerun['seconds']
+
+def test_spans_record_total_and_own_time(clock, enabled):
+    spans = {name: (seconds, own) for _, name, seconds, own in record_rerun(clock)['spans']}
+    assert spans['default_workbooks'] == (7, 1)
+    assert spans['parse_sheets'] == (4, 4)
+
+def test_span_totals_include_nested_time(clock, enabled):
+    before = instrumentation.span_totals().get(('ingest', 'default_workbooks'), (0, 0.0))
+    record_rerun(clock)
+    calls, seconds = instrumentation.span_totals()[('ingest', 'default_workbooks')]
+    assert (calls - before[0], seconds - before[1]) == (1, 7)
+    assert 'kec_span_seconds_total{stage="ingest",span="default_workbooks"}' in instrumentation.prometheus_metrics()
+
+def test_a_failing_span_still_closes(clock, enabled):
+    instrumentation.begin_rerun('test')
+    with pytest.raises(ValueError):
+        with span('ingest', 'outer'):
+            with span('ingest', 'inner'):
+                clock.advance(1)
+                raise ValueError
+    with span('rendering', 'after'):
+        clock.advance(1)
+    instrumentation.end_rerun()
+    own = {name: own for _, name, _, own in instrumentation.recent_reruns()[-1]['spans']}
+    assert own == {'inner': 1, 'outer': 0, 'after': 1}
+
+def test_disabled_spans_record_nothing(clock):
+    instrumentation.set_enabled(False)
+    count = len(instrumentation.recent_reruns())
+    instrumentation.begin_rerun('test')
+    with span('ingest', 'parse_sheets'):
+        clock.advance(1)
+    instrumentation.end_rerun()
+    assert span('ingest', 'parse_sheets') is span('filtering', 'anything')
+    assert len(instrumentation.recent_reruns()) == count
+
+# ═════════════════════════════════════════════════════════════════
+# SAMPLING PROFILER
+# ═════════════════════════════════════════════════════════════════
+def test_top_functions_group_lines_of_one_function():
+    profiler = SamplingProfiler()
+    profiler.stacks = collections.Counter({
+        ('app.py:main:10', 'data_store.py:filter_articles:200'): 3,
+        ('app.py:main:12', 'data_store.py:filter_articles:204'): 2,
+        ('app.py:main:20',): 1
+    })
+    assert profiler.top_functions() == [('data_store.py:filter_articles', 5, 5), ('app.py:main', 1, 6)]
+
+def test_profiler_stops_once_its_session_is_gone():
+    profiler = SamplingProfiler(interval=0.01, alive=lambda: False)
+    profiler.start()
+    thread = profiler._thread
+    thread.join(5)
+    assert not thread.is_alive()
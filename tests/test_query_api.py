@@ -0,0 +1,178 @@
+import io
+import json
+import os
+import threading
+import urllib.request
+from urllib.error import HTTPError
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from openpyxl import load_workbook
+
+import query_api
+from data_store import get_store
+from query_api import ARROW_MIME, make_server, start_in_background
+
+# ═════════════════════════════════════════════════════════════════
+# HELPERS
+# ═════════════════════════════════════════════════════════════════
+def get(server, path, **headers):
+    """(status, headers, body) for a GET against a running test server"""
+    url = f'http://127.0.0.1:{server.server_address[1]}{path}'
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:
+            return response.status, response.headers, response.read()
+    except HTTPError as e:
+        return e.code, e.headers, e.read()
+
+def get_json(server, path, **headers):
+    status, _, body = get(server, path, **headers)
+    return status, json.loads(body)
+
+@pytest.fixture(scope='module')
+def api_server():
+    # Port 0 picks a free port; one server serves the whole module
+    server = start_in_background(0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def dataset(articles):
+    return get_store().publish(articles)
+
+@pytest.fixture
+def server(api_server, dataset):
+    return api_server
+
+# ═════════════════════════════════════════════════════════════════
+# ROUTING AND VALIDATION
+# ═════════════════════════════════════════════════════════════════
+def test_health(server, dataset):
+    status, headers, body = get(server, '/health')
+    assert status == 200
+    assert json.loads(body) == {'version': dataset.version, 'articles': 6}
+    assert headers['ETag'] == f'"{dataset.version}-json"'
+    assert headers['Vary'] == 'Accept'
+
+@pytest.mark.parametrize('path, status', [
+    ('/nowhere', 404),
+    ('/stats/competitors/Nobody', 404),
+    ('/search', 400),
+    ('/articles?page=two', 400),
+    ('/articles?start=yesterday', 400),
+    ('/stats/sbus?sort=rank', 400),
+    ('/articles/export?type=pdf', 400)
+])
+def test_errors_win_over_if_none_match(server, dataset, path, status):
+    for tag in ['*', f'"{dataset.version}-json"']:
+        code, body = get_json(server, path, **{'If-None-Match': tag})
+        assert code == status
+        assert 'error' in body
+
+@pytest.mark.parametrize('tag', ['{etag}', 'W/{etag}', '"other", {etag}', '*'])
+def test_matching_etag_is_not_modified(server, tag):
+    _, headers, _ = get(server, '/articles?page_size=2')
+    status, headers, body = get(server, '/articles?page_size=2',
+                                **{'If-None-Match': tag.format(etag=headers['ETag'])})
+    assert status == 304
+    assert body == b''
+
+def test_etag_must_match_exactly(server, dataset):
+    # A tag that merely contains the current one is a different tag
+    status, _, _ = get(server, '/health', **{'If-None-Match': f'"{dataset.version}-json-old"'})
+    assert status == 200
+
+# ═════════════════════════════════════════════════════════════════
+# QUERIES
+# ═════════════════════════════════════════════════════════════════
+def test_pagination(server):
+    pages = [get_json(server, f'/articles?page={page}&page_size=4')[1] for page in (1, 2, 3)]
+    assert [page['total'] for page in pages] == [6, 6, 6]
+    assert [len(page['rows']) for page in pages] == [4, 2, 0]
+    titles = [row['newstitle'] for page in pages for row in page['rows']]
+    assert titles[0] == 'No competitor'
+    assert len(set(titles)) == 6
+
+def test_filters_accept_entity_aliases(server):
+    status, body = get_json(server, '/articles?competitor=tata%20projects%20ltd')
+    assert status == 200
+    assert body['total'] == 2
+    assert {row['newstitle'] for row in body['rows']} == {'Solar plant', 'Rail line'}
+
+def test_search_and_date_range(server):
+    _, body = get_json(server, '/search?q=order&start=2024-01-02&end=2024-01-04')
+    assert [row['newstitle'] for row in body['rows']] == ['Metro order']
+
+def test_stats_row_by_alias(server):
+    status, body = get_json(server, '/stats/competitors/siemens')
+    assert status == 200
+    assert [(row['name'], row['articles']) for row in body['rows']] == [('Siemens', 3)]
+
+def test_arrow_stream_round_trips(server, dataset):
+    _, _, json_body = get(server, '/articles?page_size=3')
+    for path, headers in [('/articles?page_size=3&format=arrow', {}), ('/articles?page_size=3', {'Accept': ARROW_MIME})]:
+        status, response_headers, body = get(server, path, **headers)
+        assert status == 200
+        assert response_headers['Content-Type'] == ARROW_MIME
+        assert response_headers['ETag'] == f'"{dataset.version}-arrow"'
+        table = pa.ipc.open_stream(body).read_all()
+        assert json.loads(table.schema.metadata[b'kec_meta'])['total'] == 6
+        assert table.column('newstitle').to_pylist() == [row['newstitle'] for row in json.loads(json_body)['rows']]
+
+def test_csv_export_has_every_filtered_row(server):
+    status, headers, body = get(server, '/articles/export?type=csv&sbu=Civil')
+    assert status == 200
+    assert headers['Content-Type'] == 'text/csv'
+    assert list(pd.read_csv(io.BytesIO(body))['Title']) == ['Metro order', 'Solar plant']
+
+@pytest.mark.parametrize('export_type', ['xlsx', 'parquet'])
+def test_file_exports_are_complete(server, export_type):
+    status, headers, body = get(server, f'/articles/export?type={export_type}&competitor=Siemens')
+    assert status == 200
+    assert int(headers['Content-Length']) == len(body)
+    if export_type == 'xlsx':
+        sheet = load_workbook(io.BytesIO(body), read_only=True)['Articles']
+        titles = [row[0] for row in sheet.iter_rows(min_row=2, values_only=True)]
+    else:
+        titles = pq.read_table(io.BytesIO(body)).column('Title').to_pylist()
+    assert titles == ['Rail line', 'Q3 results', 'Grid deal']
+
+def test_control_characters_do_not_break_xlsx_exports(server, articles):
+    get_store().publish(articles.assign(newstitle=articles['newstitle'].str.replace(' ', '\x0b', n=1)))
+    status, _, body = get(server, '/articles/export?type=xlsx')
+    assert status == 200
+    assert len(list(load_workbook(io.BytesIO(body), read_only=True)['Articles'].iter_rows())) == 7
+
+def test_export_errors_are_reported_before_any_data(server, monkeypatch):
+    def fail(*args):
+        raise ValueError('writer failed')
+    monkeypatch.setattr(query_api, 'export_to_file', fail)
+    status, body = get_json(server, '/articles/export?type=parquet')
+    assert status == 500
+    assert body == {'error': 'Could not build the parquet export'}
+
+# ═════════════════════════════════════════════════════════════════
+# RELOADING
+# ═════════════════════════════════════════════════════════════════
+def test_edited_workbooks_are_reloaded(tmp_path, raw_articles):
+    path = str(tmp_path / 'articles.xlsx')
+    raw_articles.to_excel(path, index=False)
+    reloaded = []
+    server = make_server(0, source=path, on_reload=reloaded.append)
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+    try:
+        _, first = get_json(server, '/health')
+        raw_articles.iloc[:4].to_excel(path, index=False)
+        # Make sure the modification time moves even on coarse-grained filesystems
+        mtime = os.path.getmtime(path) + 10
+        os.utime(path, (mtime, mtime))
+        _, second = get_json(server, '/health')
+        assert (first['articles'], second['articles']) == (6, 4)
+        assert first['version'] != second['version']
+        assert [dataset.version for dataset in reloaded] == [first['version'], second['version']]
+    finally:
+        server.shutdown()
+        server.server_close()
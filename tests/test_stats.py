@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+
+from data_store import (build_entity_codes, build_entity_stats, build_summary_stats, date_range_rows, prepare_articles,
+                        range_entity_stats)
+
+def expected_stats(articles, entity_col, related_col, related_name):
+    """The stats table computed the slow way, one name at a time by list membership"""
+    latest = articles['publishedate'].max()
+    names = sorted({name for names in articles[entity_col] for name in names})
+    rows = {}
+    for name in names:
+        mentions = articles[articles[entity_col].apply(lambda values: name in values)]
+        dates = mentions['publishedate']
+        recent = int((dates > latest - timedelta(days=30)).sum())
+        prior = int(((dates > latest - timedelta(days=60)) & (dates <= latest - timedelta(days=30))).sum())
+        rows[name] = {
+            'articles': len(mentions),
+            'categories': mentions['category'].nunique(),
+            related_name: len({value for values in mentions[related_col] for value in values}),
+            'sources': mentions['source'].nunique(),
+            'last_seen': dates.max(),
+            'last_30_days': recent,
+            'delta_30_days': recent - prior
+        }
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+def assert_stats_equal(result, expected):
+    assert list(result.index) == list(expected.index)
+    for col in expected.columns:
+        assert list(result[col]) == list(expected[col]), col
+
+@pytest.fixture
+def spread_articles(raw_articles):
+    """The fixture rows spread over ~80 days, so both 30-day windows have articles"""
+    offsets = [0, 35, 50, 70, 5, 80]
+    dates = pd.to_datetime(raw_articles['publishedate']) - pd.to_timedelta(offsets, unit='D')
+    return prepare_articles(raw_articles.assign(publishedate=dates))
+
+@pytest.mark.parametrize('entity_col, related_col, related_name', [
+    ('competitor_list', 'sbu_list', 'business_units'),
+    ('sbu_list', 'competitor_list', 'competitors')
+])
+@pytest.mark.parametrize('fixture', ['articles', 'spread_articles'])
+def test_entity_stats_match_list_membership(request, fixture, entity_col, related_col, related_name):
+    articles = request.getfixturevalue(fixture)
+    codes = build_entity_codes(articles)
+    assert_stats_equal(build_entity_stats(articles, codes, entity_col, related_col, related_name),
+                       expected_stats(articles, entity_col, related_col, related_name))
+
+def test_date_range_blocks_match_list_membership(spread_articles):
+    codes = build_entity_codes(spread_articles)
+    block = date_range_rows(spread_articles, pd.Timestamp('2023-11-01'), pd.Timestamp('2024-01-03'))
+    # The block's own newest article anchors its 30-day windows
+    assert_stats_equal(build_entity_stats(block, codes, 'competitor_list', 'sbu_list', 'business_units'),
+                       expected_stats(block, 'competitor_list', 'sbu_list', 'business_units'))
+    newest_first = block.iloc[::-1]
+    assert_stats_equal(build_entity_stats(newest_first, codes, 'sbu_list', 'competitor_list', 'competitors'),
+                       expected_stats(block, 'sbu_list', 'competitor_list', 'competitors'))
+
+def test_known_values(spread_articles):
+    stats = build_summary_stats(spread_articles, build_entity_codes(spread_articles))
+    siemens = stats['competitor'].loc['Siemens']
+    # Grid deal and Q3 results fall in the prior 30 days, Rail line is older than both windows
+    assert siemens['articles'] == 3
+    assert siemens['business_units'] == 3
+    assert siemens['last_seen'] == pd.Timestamp('2023-11-27 10:00')
+    assert siemens['last_30_days'] == 0
+    assert siemens['delta_30_days'] == -2
+    assert stats['sbu'].loc['Civil', 'competitors'] == 2
+
+def test_articles_without_entities_are_not_counted(articles):
+    stats = build_summary_stats(articles, build_entity_codes(articles))
+    assert stats['competitor']['articles'].sum() == sum(len(names) for names in articles['competitor_list'])
+    assert 'No competitor' not in stats['competitor'].index
+
+def test_empty_table_has_the_stats_columns(articles):
+    stats = build_entity_stats(articles.iloc[:0], build_entity_codes(articles), 'competitor_list', 'sbu_list',
+                               'business_units')
+    assert stats.empty
+    assert list(stats.columns) == ['articles', 'categories', 'business_units', 'sources', 'last_seen',
+                                   'last_30_days', 'delta_30_days']
+
+def test_range_stats_match_the_all_time_row(articles):
+    mentions = articles[articles['competitor_list'].apply(lambda names: 'ABB' in names)]
+    row = build_summary_stats(articles, build_entity_codes(articles))['competitor'].loc['ABB']
+    card = range_entity_stats(mentions, 'sbu_list', 'business_units')
+    assert card == {col: row[col] for col in ['articles', 'categories', 'business_units', 'sources']}
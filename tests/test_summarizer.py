@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from data_store import content_hash, prepare_articles
+from summarizer import StubBackend, SummaryCache, SummaryPipeline
+
+# ═════════════════════════════════════════════════════════════════
+# HELPERS
+# ═════════════════════════════════════════════════════════════════
+class CountingBackend(StubBackend):
+    """Stub backend that records every batch and can be held until released"""
+
+    def __init__(self, hold=False):
+        self.batches = []
+        self.release = threading.Event()
+        if not hold:
+            self.release.set()
+
+    def summarize(self, items):
+        self.release.wait(5)
+        self.batches.append([title for title, _ in items])
+        return super().summarize(items)
+
+    @property
+    def titles(self):
+        return [title for batch in self.batches for title in batch]
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out waiting for the summarizer"
+        time.sleep(0.01)
+
+def idle(pipeline):
+    enqueuing = any(t.name == 'kec-summarize-enqueue' and t.is_alive() for t in threading.enumerate())
+    return not enqueuing and pipeline.pending() == 0
+
+@pytest.fixture
+def cache(tmp_path):
+    return SummaryCache(str(tmp_path / 'summaries.sqlite3'))
+
+# ═════════════════════════════════════════════════════════════════
+# PIPELINE
+# ═════════════════════════════════════════════════════════════════
+def test_each_content_hash_is_summarized_once(articles, cache):
+    backend = CountingBackend()
+    pipeline = SummaryPipeline(backend=backend, cache=cache, batch_size=2)
+    # The same articles twice over, e.g. a sheet repeated in another workbook
+    pipeline.submit(pd.concat([articles, articles]))
+    wait_until(lambda: len(pipeline.lookup(articles['content_hash'])) == len(articles))
+    wait_until(lambda: idle(pipeline))
+
+    assert sorted(backend.titles) == sorted(articles['source_title'])
+    assert all(len(batch) <= 2 for batch in backend.batches)
+
+def test_cached_summaries_are_not_regenerated(articles, cache):
+    first = CountingBackend()
+    pipeline = SummaryPipeline(backend=first, cache=cache)
+    pipeline.submit(articles)
+    wait_until(lambda: len(pipeline.lookup(articles['content_hash'])) == len(articles))
+
+    # A fresh pipeline (e.g. after a restart) reads the same cache file
+    second = CountingBackend()
+    restarted = SummaryPipeline(backend=second, cache=cache)
+    restarted.submit(articles)
+    wait_until(lambda: idle(restarted))
+    assert second.batches == []
+    assert restarted.lookup(articles['content_hash']) == pipeline.lookup(articles['content_hash'])
+
+def test_in_flight_articles_are_not_queued_twice(articles, cache):
+    backend = CountingBackend(hold=True)
+    pipeline = SummaryPipeline(backend=backend, cache=cache, batch_size=len(articles))
+    pipeline.submit(articles)
+    wait_until(lambda: pipeline.pending() == len(articles))
+
+    # Reruns keep asking while the first batch is still running
+    pipeline.submit(articles)
+    pipeline.submit(articles)
+    assert pipeline.lookup(articles['content_hash']) == {}
+
+    backend.release.set()
+    wait_until(lambda: idle(pipeline))
+    assert sorted(backend.titles) == sorted(articles['source_title'])
+
+def test_backend_gets_the_text_the_cache_key_was_computed_from(raw_articles, cache):
+    long_title = 'Metro order ' + 'x' * 300
+    articles = prepare_articles(raw_articles.assign(newstitle=[long_title] + list(raw_articles['newstitle'][1:])))
+    backend = CountingBackend()
+    pipeline = SummaryPipeline(backend=backend, cache=cache)
+    pipeline.submit(articles)
+    wait_until(lambda: len(pipeline.lookup(articles['content_hash'])) == len(articles))
+    # The table shows a truncated title, but the summary is keyed on (and made from) the full one
+    assert long_title in backend.titles
+    row = articles[articles['source_title'] == long_title].iloc[0]
+    assert len(row['newstitle']) == 200
+    assert row['content_hash'] == content_hash(long_title, row['source_text'])
+
+def test_articles_without_text_are_skipped(articles, cache):
+    backend = CountingBackend()
+    pipeline = SummaryPipeline(backend=backend, cache=cache)
+    pipeline.submit(articles.assign(source_text='No summary available'))
+    wait_until(lambda: idle(pipeline))
+    assert backend.batches == []
+
+def test_a_backend_that_cannot_start_is_logged_not_raised(articles, cache, caplog):
+    pipeline = SummaryPipeline(cache=cache, backend_name='no-such-backend')
+    pipeline.submit(articles)
+    wait_until(lambda: idle(pipeline))
+    assert pipeline.lookup(articles['content_hash']) == {}
+    assert "Could not start the 'no-such-backend' summary backend" in caplog.text